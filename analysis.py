@@ -0,0 +1,240 @@
+"""
+Strategy analysis of computer players over a fixed corpus of seeded deals, for regression testing.
+
+Every deal is replayed with the given agents (move functions like get_computer_move), and before each move
+a reference evaluator scores every legal move the player had. The reference evaluator plays the rest of
+the game out with the get_computer_move policy (see playout.py) after each candidate move and scores it
+1.0 if the mover's side wins and 0.0 if it loses. A move's delta is the score of the best candidate minus
+the score of the move that was made, and moves with a delta of at least the blunder threshold are flagged.
+
+Deals are analysed in worker processes. Each deal's analysis is cached on disk under the agents' version
+(by default a checksum of the agents' source files, the engine and evaluator sources and any tables the agents
+read), so rerunning an unchanged agent skips the work.
+The report has one line of sorted JSON per deal in seed order, so reports of two versions can be compared
+with any diff tool.
+
+    python analysis.py --deals 200 --workers 4 --report report.jsonl
+"""
+
+
+import argparse # for the command line interface
+import hashlib # for agent versions
+import inspect # for finding the agents' source files
+import json # for the cache and report files
+import multiprocessing # for analysing deals in worker processes
+import os # for cache paths
+
+from beat_the_landlord import (SEATS, _combo_key, get_game_result, get_legal_moves, new_game_state, step_game)
+from playout import hand_key, playout
+from simulation import write_json_atomically
+from tournament import deal_seeded_hands, load_agent
+
+# bumped whenever the reference evaluator or the cached analysis changes, so old cache entries are not reused
+ANALYSIS_VERSION = 1
+
+def _update_checksum(checksum, path):
+    """
+    Takes a hashlib checksum and a file path as arguments and adds the file's contents to the checksum
+    (a missing file adds nothing, so building it later changes the checksum)
+    """
+    try:
+        with open(path, "rb") as checked_file:
+            checksum.update(checked_file.read())
+    except OSError:
+        pass
+
+def get_agent_version(agent_specs):
+    """
+    Takes an agent specification ("module:function") per seat as an argument and returns a short checksum
+    of the specifications, the source files of the agents' modules, the engine and reference evaluator sources
+    and the tables the agents read (named by a "table_path" function attribute, like get_policy_move's),
+    which changes whenever an agent's moves or the reference scores can
+    """
+    checksum = hashlib.sha1()
+    for function in (step_game, playout): # every agent plays through the engine, and playouts score the moves
+        _update_checksum(checksum, inspect.getsourcefile(function))
+    for spec in agent_specs:
+        checksum.update(spec.encode())
+        agent = load_agent(spec)
+        source_file = inspect.getsourcefile(agent)
+        if source_file is not None:
+            _update_checksum(checksum, source_file)
+        table_path = getattr(agent, "table_path", None)
+        if table_path is not None:
+            _update_checksum(checksum, table_path())
+    return checksum.hexdigest()[:12]
+
+def evaluate_move(state, move, hand_keys):
+    """
+    Takes a game state, a move the current player could make ("pass" or a combo) and the packed hands of the
+    state (see playout.load_hands) as arguments and returns the reference score of the move: 1.0 if the
+    mover's side wins when everyone continues with the get_computer_move policy, otherwise 0.0
+    """
+    seats = len(state["hands"])
+    mover = state["current_index"]
+    hand_keys = list(hand_keys) # the playout updates its hands in place
+    cards_left = [len(hand) for hand in state["hands"]]
+    if move == "pass":
+        played_combo = state["last_played_combo"]
+        passes_in_a_row = state["passes_in_a_row"] + 1
+        if passes_in_a_row == seats - 1: # everyone else passed, so the next player starts a new round
+            played_combo = None
+            passes_in_a_row = 0
+    else:
+        hand_keys[mover] -= _combo_key(move)
+        cards_left[mover] -= len(move)
+        if cards_left[mover] == 0: # the move wins the game outright
+            return 1.0
+        played_combo = move
+        passes_in_a_row = 0
+    winner = playout(hand_keys, cards_left, (mover + 1) % seats, played_combo, passes_in_a_row)
+    if (winner == 0) == (mover == 0): # the landlord (first seat) plays alone against the peasants
+        return 1.0
+    return 0.0
+
+def analyse_deal(seed, agent_specs):
+    """
+    Takes a seed and an agent specification ("module:function") per seat as arguments, replays the seeded deal
+    with those agents and returns a dictionary with the game result and, for every move, the seat, the move,
+    its reference score, the best reference score available and a best move (the first one found with that score)
+    """
+    move_functions = [load_agent(spec) for spec in agent_specs]
+    state = new_game_state(deal_seeded_hands(seed))
+    moves = []
+    while state["winner"] is None:
+        mover = state["current_index"]
+        hand_keys = [hand_key(hand) for hand in state["hands"]]
+        candidates = list(get_legal_moves(state["last_played_combo"], state["hands"][mover]).values())
+        if state["last_played_combo"] is not None: # passing is only allowed when responding
+            candidates.append("pass")
+        scores = {} # reference score of every candidate, keyed like get_legal_moves ("pass" for passing)
+        best_score = -1.0
+        best_move = None
+        for candidate in candidates:
+            score = evaluate_move(state, candidate, hand_keys)
+            if candidate == "pass":
+                scores["pass"] = score
+            else:
+                scores[_combo_key(candidate)] = score
+            if score > best_score:
+                best_score = score
+                best_move = candidate
+        move = step_game(state, move_functions) # step_game rejects illegal moves, so the move is a candidate
+        moves.append({"seat": SEATS[mover],
+                      "move": move,
+                      "score": scores["pass"] if move == "pass" else scores[_combo_key(move)],
+                      "best_score": best_score,
+                      "best_move": best_move})
+    result = get_game_result(state)
+    return {"seed": seed,
+            "winner": result["winner"],
+            "winning_side": result["winning_side"],
+            "moves": moves}
+
+def cache_path(cache_directory, agent_version, seed):
+    """
+    Takes a cache directory, an agent version and a seed as arguments and returns the path of the cached analysis
+    """
+    return os.path.join(cache_directory, f"v{ANALYSIS_VERSION}-{agent_version}", f"{seed}.json")
+
+def _analyse_deal_task(task):
+    """
+    Takes a (seed, agent_specs, agent_version, cache_directory) tuple as an argument and returns the deal's analysis,
+    reading it from the cache if it is there and writing it to the cache otherwise (no cache if the directory is None).
+    Used by worker processes.
+    """
+    seed, agent_specs, agent_version, cache_directory = task
+    if cache_directory is not None:
+        path = cache_path(cache_directory, agent_version, seed)
+        try:
+            with open(path) as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError): # not cached yet (or a damaged entry), so analyse it again
+            pass
+    analysis = analyse_deal(seed, agent_specs)
+    if cache_directory is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_json_atomically(path, analysis)
+    return analysis
+
+def summarize_deal(analysis, blunder_threshold=1.0):
+    """
+    Takes a deal's analysis and a blunder threshold as arguments and returns the deal's compact report entry:
+    the winner, the number of moves, the total delta and every blunder as [move number, seat, move, best move]
+    """
+    total_delta = 0.0
+    blunders = []
+    for move_number, move in enumerate(analysis["moves"], 1):
+        delta = move["best_score"] - move["score"]
+        total_delta += delta
+        if delta >= blunder_threshold:
+            blunders.append([move_number, move["seat"], move["move"], move["best_move"]])
+    return {"seed": analysis["seed"],
+            "winner": analysis["winner"],
+            "moves": len(analysis["moves"]),
+            "total_delta": total_delta,
+            "blunders": blunders}
+
+def run_analysis(seeds, agent_specs, workers=1, cache_directory=None, agent_version=None, blunder_threshold=1.0):
+    """
+    Takes seeds, an agent specification per seat, a number of worker processes, an optional cache directory,
+    an optional agent version (get_agent_version by default) and a blunder threshold as arguments, analyses
+    every deal and returns the report: a summary dictionary followed by one entry per deal in seed order
+    """
+    if agent_version is None:
+        agent_version = get_agent_version(agent_specs)
+    tasks = [(seed, tuple(agent_specs), agent_version, cache_directory) for seed in seeds]
+    if workers == 1:
+        analyses = [_analyse_deal_task(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            analyses = list(pool.imap_unordered(_analyse_deal_task, tasks))
+    entries = sorted((summarize_deal(analysis, blunder_threshold) for analysis in analyses), key=lambda entry: entry["seed"])
+    moves = sum(entry["moves"] for entry in entries)
+    blunders = sum(len(entry["blunders"]) for entry in entries)
+    landlord_wins = sum(1 for entry in entries if entry["winner"] == SEATS[0])
+    summary = {"agents": list(agent_specs),
+               "agent_version": agent_version,
+               "analysis_version": ANALYSIS_VERSION,
+               "deals": len(entries),
+               "moves": moves,
+               "blunders": blunders,
+               "blunder_rate": blunders / moves if moves else 0.0,
+               "landlord_win_rate": landlord_wins / len(entries) if entries else 0.0}
+    return [summary] + entries
+
+def write_report(report, file):
+    """
+    Takes a report from run_analysis and an open text file as arguments and writes one line of sorted JSON per entry
+    """
+    for entry in report:
+        file.write(json.dumps(entry, sort_keys=True) + "\n")
+
+def main(argv=None):
+    """
+    Command line interface for analysing a deal corpus and writing its report
+    """
+    parser = argparse.ArgumentParser(description="Analyse Beat the Landlord computer players over a fixed deal corpus.")
+    parser.add_argument("--deals", type=int, default=100, help="number of deals in the corpus")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first deal")
+    parser.add_argument("--agents", nargs=len(SEATS), metavar="MODULE:FUNCTION",
+                        default=["beat_the_landlord:get_computer_move"] * len(SEATS),
+                        help="agent for each seat: " + ", ".join(SEATS))
+    parser.add_argument("--agent-version", help="version to cache results under (default: checksum of the agents', engine's and evaluator's sources and tables)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--cache", default="analysis_cache", help="directory of cached deal analyses (\"\" for no cache)")
+    parser.add_argument("--blunder-threshold", type=float, default=1.0, help="smallest delta flagged as a blunder")
+    parser.add_argument("--report", help="path of the report to write (printed if not given)")
+    args = parser.parse_args(argv)
+    seeds = range(args.first_seed, args.first_seed + args.deals)
+    report = run_analysis(seeds, args.agents, args.workers, args.cache or None, args.agent_version, args.blunder_threshold)
+    if args.report is None:
+        print(json.dumps(report[0], indent=4))
+    else:
+        with open(args.report, "w") as report_file:
+            write_report(report, report_file)
+        print(f"Wrote {report[0]['deals']} deals ({report[0]['blunders']} blunders) to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
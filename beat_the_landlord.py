@@ -8,7 +8,15 @@ seemed relevant to my experience coding this.
 
 import random # for shuffling collections
 from itertools import combinations # for enumerating combinations
+from math import comb # for counting combinations without enumerating them
 import time # for slowing down printed outputs
+import json # for logging game events as JSON lines
+import os # for locating the precomputed tables
+import mmap # for sharing precomputed tables between processes
+import struct # for the precomputed tables' file header
+import tempfile # for writing precomputed tables atomically
+import zlib # for fingerprinting the rules the precomputed tables were built from
+from bisect import bisect_left # for searching the precomputed combo table
 
 # establishes relative ordering of values
 RANK_ORDER = ("3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A", "2", "B", "R")
@@ -29,40 +37,82 @@ DEFINED_COMBOS = ("single",
                   "bomb", 
                   "rocket")
 
-def generate_shuffled_deck(): 
+# establishes seats in turn order for games played without the user
+SEATS = ("landlord", "peasant 1", "peasant 2")
+
+# establishes the rules of supported game variants:
+#   decks: number of standard 54-card decks shuffled together
+#   seats: number of players (one landlord, the rest peasants)
+#   leftovers: number of cards left over for the landlord after dealing
+#   bomb_ranking: "rank" compares bombs by rank only, "size" lets bombs with more cards beat smaller ones first
+#   quad_attachments: whether four of a kind may be played with two singles or two pairs attached
+STANDARD_RULES = {"name": "standard",
+                  "decks": 1,
+                  "seats": 3,
+                  "leftovers": 3,
+                  "bomb_ranking": "rank",
+                  "quad_attachments": True}
+TWO_DECK_RULES = {"name": "two-deck",
+                  "decks": 2,
+                  "seats": 4,
+                  "leftovers": 8,
+                  "bomb_ranking": "size",
+                  "quad_attachments": False}
+RULES = {STANDARD_RULES["name"]: STANDARD_RULES, TWO_DECK_RULES["name"]: TWO_DECK_RULES}
+
+def get_seats(rules=None):
     """
-    Constructs and returns a shuffled standard deck without suits
+    Takes optional rules as an argument and returns the seats in turn order for games played without the user
+    """
+    if rules is None or rules["seats"] == len(SEATS):
+        return SEATS
+    seats = ["landlord"]
+    for i in range(rules["seats"] - 1):
+        seats.append(f"peasant {i + 1}")
+    return tuple(seats)
+
+def generate_shuffled_deck(rng=None, rules=None): 
     """
+    Constructs and returns a shuffled deck without suits (one standard deck unless the rules say otherwise).
+    Takes an optional random.Random instance as an argument so that deals can be reproduced from a seed.
+    """
+    if rules is None:
+        rules = STANDARD_RULES
     deck = []
     for rank in RANK_ORDER: # add all the cards to the deck
-        if rank != "B" and rank != "R": # add four of each card except Jokers
-            for i in range(4):
+        if rank != "B" and rank != "R": # add four of each card per deck except Jokers
+            for i in range(4 * rules["decks"]):
                 deck.append(rank)
         else: 
-            deck.append(rank)
-    random.shuffle(deck) # shuffle deck
+            for i in range(rules["decks"]):
+                deck.append(rank)
+    if rng is None: # fall back to the module-level generator
+        rng = random
+    rng.shuffle(deck) # shuffle deck
     return deck
 
-def deal_hands_with_leftovers(deck):
+def deal_hands_with_leftovers(deck, rules=None):
     """
-    Takes a deck as an argument and "deals it," returning three hands
-    and a leftover pile of cards for bidding.
+    Takes a deck (and optional rules) as an argument and "deals it," returning one hand per seat
+    (three hands with the standard rules) followed by a leftover pile of cards for bidding.
     It mirrors "real-life" dealing by dealing from top of deck and 
     leaving an empty deck after dealing,
     """
-    if len(deck) != 54:
-        raise ValueError("deal_hands_with_leftovers expects a 54-card deck")
-    hand_1 = []
-    hand_2 = []
-    hand_3 = []
+    if rules is None:
+        rules = STANDARD_RULES
+    deck_size = 54 * rules["decks"]
+    if len(deck) != deck_size:
+        raise ValueError(f"deal_hands_with_leftovers expects a {deck_size}-card deck")
+    hands = []
+    for seat in range(rules["seats"]):
+        hands.append([])
     leftovers = []
-    for i in range(17): # deal cards to each person in order
-        hand_1.append(deck.pop(0))
-        hand_2.append(deck.pop(0))
-        hand_3.append(deck.pop(0))
-    for j in range(3):
+    for i in range((deck_size - rules["leftovers"]) // rules["seats"]): # deal cards to each person in order
+        for hand in hands:
+            hand.append(deck.pop(0))
+    for j in range(rules["leftovers"]):
         leftovers.append(deck.pop(0)) # the remaining "deck" is the leftovers pile
-    return hand_1, hand_2, hand_3, leftovers 
+    return tuple(hands) + (leftovers,)
 
 def sorted_cards(cards): 
     """ 
@@ -87,11 +137,233 @@ def get_rank(card):
         raise ValueError("invalid card")
     return RANK_ORDER.index(card)
 
-def get_combo_type(combo): 
+# bitmask of the ranks that can be part of a sequence (3 through A; 2's and Jokers not allowed),
+# where bit i stands for RANK_ORDER[i]
+SEQUENCE_RANKS_MASK = (1 << (len(RANK_ORDER) - 3)) - 1
+
+def _ranks_mask(ranks):
+    """ 
+    Takes a group of valid ranks as an argument and returns a bitmask with bit i set for each RANK_ORDER[i] present
+    """
+    mask = 0
+    for rank in ranks:
+        mask |= 1 << _RANK_INDEXES[rank]
+    return mask
+
+def _is_run(mask):
+    """ 
+    Takes a bitmask of ranks as an argument and returns True if the ranks are consecutive
+    and can all be part of a sequence, returns False otherwise
+    """
+    if mask == 0 or mask & ~SEQUENCE_RANKS_MASK: # no ranks, or 2's or Jokers present
+        return False
+    shifted = mask >> ((mask & -mask).bit_length() - 1) # shift lowest rank down to bit 0
+    return (shifted & (shifted + 1)) == 0 # consecutive bits from bit 0 become a single carry when incremented
+
+def _find_runs(mask, possible_lengths):
+    """ 
+    Takes a bitmask of ranks and the possible sequence lengths (ascending and consecutive) as arguments and
+    returns every run of consecutive sequence ranks as (start index, length) tuples, ordered by length then rank
+    """
+    mask &= SEQUENCE_RANKS_MASK
+    runs = []
+    starts = mask # bit i is set when a run of the current length starts at rank i
+    length = 1
+    for target_length in possible_lengths:
+        while length < target_length: # extend every run by one rank with a shift and an AND
+            starts &= mask >> length
+            length += 1
+        if starts == 0: # no runs of this length, so none of any longer length either
+            break
+        remaining = starts
+        while remaining: # visit set bits from lowest rank to highest rank
+            lowest_bit = remaining & -remaining
+            runs.append((lowest_bit.bit_length() - 1, length))
+            remaining ^= lowest_bit
+    return runs
+
+# precomputed combo table: every valid combo, keyed by how many cards of each rank it contains.
+# It is built once, saved in TABLES_DIRECTORY and memory-mapped read-only by every process that needs it.
+TABLES_DIRECTORY = os.environ.get("BEAT_THE_LANDLORD_TABLES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables"))
+# bump when the file layout changes; changes to how combos are classified or generated are caught by the
+# fingerprint of the functions in _COMBO_TABLE_FUNCTIONS instead (see _rules_fingerprint)
+COMBO_TABLE_VERSION = 1
+# the functions that decide which combos the table holds and their types and ranks
+_COMBO_TABLE_FUNCTIONS = ("get_rank", "sorted_cards", "_ranks_mask", "_is_run", "_find_runs", "_find_sequences",
+                          "_combo_key", "iter_combos", "_generate_combos", "_classify_combo_type", "_classify_combo_rank",
+                          "is_single", "is_sequence_of_singles", "is_pair", "is_sequence_of_pairs", "is_triplet",
+                          "is_triplet_with_single", "is_triplet_with_pair", "is_sequence_of_triplets",
+                          "is_sequence_of_triplets_with_singles", "is_sequence_of_triplets_with_pairs",
+                          "is_quad_with_two_singles", "is_quad_with_two_pairs", "is_bomb", "is_rocket",
+                          "build_combo_table")
+_COMBO_TABLE_MAGIC = b"BTLC"
+_COMBO_TABLE_HEADER = struct.Struct("<4sIII") # magic, version, rules fingerprint, number of entries
+_RANK_INDEXES = {rank: index for index, rank in enumerate(RANK_ORDER)}
+_combo_table = None # (keys, values) once loaded, see _get_combo_table
+# set by metrics.instrument() only while a decision is sampled (one at a time), so the decisions that aren't
+# sampled only pay for checking a module global for None
+_metrics_sampler = None
+
+def _combo_key(combo):
+    """ 
+    Takes a combo as an argument and returns an integer packing how many cards of each rank it contains
+    (four bits per rank), or None if it contains an invalid card or too many cards of one rank to pack
+    """
+    key = 0
+    for card in combo:
+        index = _RANK_INDEXES.get(card)
+        if index is None: # invalid card
+            return None
+        key += 1 << (4 * index)
+    if len(combo) >= 16: # 16 or more cards of a rank would overflow into the next rank's bits
+        packed_total = 0
+        remaining = key
+        while remaining:
+            packed_total += remaining & 15
+            remaining >>= 4
+        if packed_total != len(combo):
+            return None
+    return key
+
+def _code_fingerprint(code, checksum):
+    """ 
+    Takes a function's code object and a running CRC-32 checksum as arguments and returns the checksum updated with
+    the code's bytecode, names and constants (including the code of nested functions and generators)
+    """
+    checksum = zlib.crc32(code.co_code, checksum)
+    checksum = zlib.crc32(" ".join(code.co_names).encode(), checksum)
+    for constant in code.co_consts:
+        if hasattr(constant, "co_code"): # nested code, e.g. a generator expression
+            checksum = _code_fingerprint(constant, checksum)
+        elif isinstance(constant, frozenset): # set order changes between processes, so sort it first
+            checksum = zlib.crc32(repr(sorted(constant, key=repr)).encode(), checksum)
+        else:
+            checksum = zlib.crc32(repr(constant).encode(), checksum)
+    return checksum
+
+def _rules_fingerprint():
+    """ 
+    Returns a checksum of the ranks, combo types, standard rules and the code of the functions that classify and
+    generate combos, so tables built for different rules or by a different classification are never reused
+    """
+    checksum = zlib.crc32(("|".join(RANK_ORDER) + "/" + "|".join(DEFINED_COMBOS) + "/" + repr(STANDARD_RULES)).encode())
+    for name in _COMBO_TABLE_FUNCTIONS:
+        checksum = _code_fingerprint(globals()[name].__code__, checksum)
+    return checksum
+
+def build_combo_table():
+    """ 
+    Enumerates every valid combo of a full deck and returns the combo table file contents as bytes:
+    a header, the sorted combo keys (unsigned 64-bit) and for each key its combo type index and rank
+    (unsigned 16-bit, type index * 256 + rank)
+    """
+    full_deck = generate_shuffled_deck(random.Random(0)) # every combo is contained in a full deck
+    entries = {}
+    for combo_type in DEFINED_COMBOS:
+        for combo in iter_combos(full_deck, combo_type):
+            if _classify_combo_type(combo) != combo_type: # generation and validation must agree
+                raise AssertionError(f"generated {combo} as {combo_type} but it validates as {_classify_combo_type(combo)}")
+            entries[_combo_key(combo)] = DEFINED_COMBOS.index(combo_type) * 256 + _classify_combo_rank(combo)
+    keys = sorted(entries)
+    header = _COMBO_TABLE_HEADER.pack(_COMBO_TABLE_MAGIC, COMBO_TABLE_VERSION, _rules_fingerprint(), len(keys))
+    values = [entries[key] for key in keys]
+    return header + struct.pack(f"<{len(keys)}Q", *keys) + struct.pack(f"<{len(values)}H", *values)
+
+def _parse_combo_table(buffer):
+    """ 
+    Takes the combo table file contents (bytes or a memory map) as an argument and returns (keys, values)
+    memoryviews over it, or None if the header does not match the current version and rules
+    """
+    if len(buffer) < _COMBO_TABLE_HEADER.size:
+        return None
+    magic, version, fingerprint, count = _COMBO_TABLE_HEADER.unpack_from(buffer, 0)
+    if magic != _COMBO_TABLE_MAGIC or version != COMBO_TABLE_VERSION or fingerprint != _rules_fingerprint():
+        return None
+    if len(buffer) != _COMBO_TABLE_HEADER.size + count * 10:
+        return None
+    view = memoryview(buffer)
+    keys_start = _COMBO_TABLE_HEADER.size
+    values_start = keys_start + count * 8
+    keys = view[keys_start : values_start].cast("Q")
+    values = view[values_start :].cast("H")
+    return keys, values
+
+def combo_table_path():
+    """ 
+    Returns the path of the combo table file for the current table version
+    """
+    return os.path.join(TABLES_DIRECTORY, f"combo_table_v{COMBO_TABLE_VERSION}.bin")
+
+def _get_combo_table():
     """ 
-    Takes a combo (a group of cards) as an argument and returns what kind
+    Returns the (keys, values) of the combo table, memory-mapping the saved file the first time it is needed.
+    A missing or outdated file is rebuilt and saved atomically; if it can't be saved, the table is kept in memory.
+    """
+    global _combo_table
+    if _combo_table is not None:
+        return _combo_table
+    path = combo_table_path()
+    try:
+        with open(path, "rb") as table_file:
+            table = _parse_combo_table(mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError): # missing or empty file
+        table = None
+    if table is None: # build the table and try to save it for the next process
+        contents = build_combo_table()
+        try:
+            os.makedirs(TABLES_DIRECTORY, exist_ok=True)
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=TABLES_DIRECTORY, prefix=".tmp-")
+            with os.fdopen(file_descriptor, "wb") as temporary_file:
+                temporary_file.write(contents)
+            os.chmod(temporary_path, 0o644) # shared read-only with every other process
+            os.replace(temporary_path, path) # readers never see a partly written table
+        except OSError: # read-only location, so just use the table from memory
+            pass
+        table = _parse_combo_table(contents)
+    _combo_table = table
+    return _combo_table
+
+def _lookup_combo(combo, rules=None):
+    """ 
+    Takes a combo and optional rules as arguments and returns its (combo type, combo rank), or ("invalid combo", None)
+    if it isn't a valid combo. Combos that can't be found in the combo table (invalid ones, ones that no single
+    deck could hold, like two Black Jokers, and ones the rules treat differently from the standard rules)
+    are classified from the is_* checks.
+    """
+    if _metrics_sampler is not None: # count combo table hits for a sampled decision
+        _metrics_sampler.count_lookup()
+    key = _combo_key(combo)
+    if key is not None:
+        keys, values = _get_combo_table()
+        index = bisect_left(keys, key)
+        if index != len(keys) and keys[index] == key:
+            value = values[index]
+            combo_type = DEFINED_COMBOS[value >> 8]
+            if rules is None or rules is STANDARD_RULES:
+                return combo_type, value & 255
+            # four-card bombs rank the same under either bomb ranking, so only quads with attachments
+            # and the one-deck rocket can differ between variants
+            if combo_type != "rocket" and (rules["quad_attachments"] or not combo_type.startswith("quad")):
+                return combo_type, value & 255
+    if _metrics_sampler is not None:
+        _metrics_sampler.count_miss()
+    combo_type = _classify_combo_type(combo, rules)
+    if combo_type == "invalid combo":
+        return combo_type, None
+    return combo_type, _classify_combo_rank(combo, rules)
+
+def get_combo_type(combo, rules=None): 
+    """ 
+    Takes a combo (a group of cards) and optional rules as arguments and returns what kind
     of combo it is, returns "invalid combo" if not a valid combo
     """
+    return _lookup_combo(combo, rules)[0]
+
+def _classify_combo_type(combo, rules=None): 
+    """ 
+    Takes a combo and optional rules as arguments and works out its combo type from the is_* checks,
+    without the combo table
+    """
     # given cases are mutually exclusive 
     if is_single(combo):
         return "single"
@@ -113,13 +385,13 @@ def get_combo_type(combo):
         return "sequence of triplets with singles"
     elif is_sequence_of_triplets_with_pairs(combo):
         return "sequence of triplets with pairs"
-    elif is_quad_with_two_singles(combo):
+    elif is_quad_with_two_singles(combo, rules):
         return "quad with two singles"
-    elif is_quad_with_two_pairs(combo):
+    elif is_quad_with_two_pairs(combo, rules):
         return "quad with two pairs"
-    elif is_bomb(combo):
+    elif is_bomb(combo, rules):
         return "bomb"
-    elif is_rocket(combo):
+    elif is_rocket(combo, rules):
         return "rocket"
     else:
         return "invalid combo"
@@ -138,13 +410,12 @@ def is_sequence_of_singles(combo):
     for card in combo: # check for invalid cards
         if card not in RANK_ORDER:
             return False
-    if len(combo) < 5 or "2" in combo or "B" in combo or "R" in combo: # invalid combos 
+    if len(combo) < 5: # invalid combos 
         return False
-    sorted_combo = sorted_cards(combo)
-    for i in range(len(sorted_combo) - 1): # check if cards are consecutive
-        if get_rank(sorted_combo[i]) != get_rank(sorted_combo[i + 1]) - 1: 
-            return False 
-    return True
+    ranks_mask = _ranks_mask(combo)
+    if len(combo) != bin(ranks_mask).count("1"): # check that no rank repeats
+        return False
+    return _is_run(ranks_mask) # check if cards are consecutive, without 2's or Jokers
 
 def is_pair(combo):
     """ 
@@ -165,8 +436,6 @@ def is_sequence_of_pairs(combo):
     for card in combo: # check for invalid cards
         if card not in RANK_ORDER:
             return False
-    if "2" in combo or "B" in combo or "R" in combo: # check for invalid cards used in combo
-        return False
     rank_counts = {} 
     for card in combo: # put combo into a dictionary representing frequency of each card 
         if card not in rank_counts:
@@ -178,12 +447,7 @@ def is_sequence_of_pairs(combo):
             return False
     if len(rank_counts) < 3: # check for at least 3 pairs
         return False
-    ranks_list = list(rank_counts.keys()) 
-    sorted_ranks_list = sorted_cards(ranks_list) # get a sorted list of the ranks in combo
-    for i in range(len(sorted_ranks_list) - 1): # check ranks are consecutive
-        if get_rank(sorted_ranks_list[i]) != get_rank(sorted_ranks_list[i + 1]) - 1:
-            return False
-    return True
+    return _is_run(_ranks_mask(rank_counts)) # check ranks are consecutive, without 2's or Jokers
 
 def is_triplet(combo):
     """ 
@@ -250,8 +514,6 @@ def is_sequence_of_triplets(combo):
     for card in combo: # check for invalid cards
         if card not in RANK_ORDER:
             return False
-    if "2" in combo or "B" in combo or "R" in combo: # check for invalid cards used in combo
-        return False
     rank_counts = {} 
     for card in combo: # put combo into a dictionary representing frequency of each card 
         if card not in rank_counts:
@@ -263,12 +525,7 @@ def is_sequence_of_triplets(combo):
             return False
     if len(rank_counts) < 2: # check for at least 2 triplets
         return False
-    ranks_list = list(rank_counts.keys()) 
-    sorted_ranks_list = sorted_cards(ranks_list) # get a sorted list of the ranks in combo
-    for i in range(len(sorted_ranks_list) - 1): # check ranks are consecutive
-        if get_rank(sorted_ranks_list[i]) != get_rank(sorted_ranks_list[i + 1]) - 1:
-            return False
-    return True
+    return _is_run(_ranks_mask(rank_counts)) # check ranks are consecutive, without 2's or Jokers
 
 def is_sequence_of_triplets_with_singles(combo):
     """ 
@@ -296,17 +553,11 @@ def is_sequence_of_triplets_with_singles(combo):
             singles_ranks.append(rank)
     if len(triplets_ranks) != len(singles_ranks): # number of triplets must match number of singles
         return False
-    if "2" in triplets_ranks: # check for invalid cards in triplets
-        return False
     if "B" in singles_ranks and "R" in singles_ranks: # check for invalid singles - both Jokers cannot be used in combo
         return False 
     if len(triplets_ranks) < 2: # check for at least 2 triplets
         return False
-    sorted_triplets_ranks = sorted_cards(triplets_ranks) 
-    for i in range(len(sorted_triplets_ranks) - 1): # check triplets are consecutive
-        if get_rank(sorted_triplets_ranks[i]) != get_rank(sorted_triplets_ranks[i + 1]) - 1:
-            return False
-    return True
+    return _is_run(_ranks_mask(triplets_ranks)) # check triplets are consecutive, without 2's or Jokers
 
 def is_sequence_of_triplets_with_pairs(combo):
     """ 
@@ -334,21 +585,17 @@ def is_sequence_of_triplets_with_pairs(combo):
             pairs_ranks.append(rank)
     if len(triplets_ranks) != len(pairs_ranks): # number of triplets must match number of pairs
         return False
-    if "2" in triplets_ranks: # check for invalid cards in triplets
-        return False
     if len(triplets_ranks) < 2: # check for at least 2 triplets
         return False
-    sorted_triplets_ranks = sorted_cards(triplets_ranks) 
-    for i in range(len(sorted_triplets_ranks) - 1): # check triplets are consecutive
-        if get_rank(sorted_triplets_ranks[i]) != get_rank(sorted_triplets_ranks[i + 1]) - 1:
-            return False
-    return True
+    return _is_run(_ranks_mask(triplets_ranks)) # check triplets are consecutive, without 2's or Jokers
 
-def is_quad_with_two_singles(combo):
+def is_quad_with_two_singles(combo, rules=None):
     """ 
-    Takes a combo as an argument and returns True if it is a "quad with two singles" combo type,
+    Takes a combo and optional rules as arguments and returns True if it is a "quad with two singles" combo type,
     returns False otherwise
     """
+    if rules is not None and not rules["quad_attachments"]: # quads are always bombs in this variant
+        return False
     if len(combo) != 6: # check for invalid number of cards
         return False
     for card in combo: # check for invalid cards
@@ -370,11 +617,13 @@ def is_quad_with_two_singles(combo):
     count_singles = counts_list.count(1) # counts how many singles exist
     return (count_quads == 1 and count_singles == 2)
 
-def is_quad_with_two_pairs(combo):
+def is_quad_with_two_pairs(combo, rules=None):
     """ 
-    Takes a combo as an argument and returns True if it is a "quad with two pairs" combo type,
+    Takes a combo and optional rules as arguments and returns True if it is a "quad with two pairs" combo type,
     returns False otherwise
     """
+    if rules is not None and not rules["quad_attachments"]: # quads are always bombs in this variant
+        return False
     if len(combo) != 8: # check for invalid number of cards
         return False
     for card in combo: # check for invalid cards
@@ -394,35 +643,51 @@ def is_quad_with_two_pairs(combo):
     count_pairs = counts_list.count(2) # counts how many pairs exist
     return (count_quads == 1 and count_pairs == 2)
 
-def is_bomb(combo):
+def is_bomb(combo, rules=None):
     """ 
-    Takes a combo as an argument and returns True if it is a "bomb" combo type, returns False otherwise
+    Takes a combo and optional rules as arguments and returns True if it is a "bomb" combo type, returns False otherwise.
+    A bomb is four cards of a rank, or with more than one deck anywhere from four cards up to every copy of a rank.
     """
-    if len(combo) != 4: # check for invalid number of cards
+    if rules is None:
+        rules = STANDARD_RULES
+    if len(combo) < 4 or len(combo) > 4 * rules["decks"]: # check for invalid number of cards
         return False
     for card in combo: # check for invalid cards
         if card not in RANK_ORDER:
             return False
-    return (combo[0] == combo[1] and combo[1] == combo[2] and combo[2] == combo[3])
+    for card in combo: # check all cards are the same rank
+        if card != combo[0]:
+            return False
+    return True
 
 
-def is_rocket(combo):
+def is_rocket(combo, rules=None):
     """ 
-    Takes a combo as an argument and returns True if it is a "rocket" combo type, returns False otherwise
+    Takes a combo and optional rules as arguments and returns True if it is a "rocket" combo type, returns False otherwise.
+    A rocket is every Joker in the deck: one Black and one Red Joker per deck.
     """
-    if len(combo) != 2: # check for invalid number of cards
+    if rules is None:
+        rules = STANDARD_RULES
+    if len(combo) != 2 * rules["decks"]: # check for invalid number of cards
         return False
     for card in combo:  # check for invalid cards
         if card not in RANK_ORDER:
             return False
-    return ("B" in combo and "R" in combo)
+    return (combo.count("B") == rules["decks"] and combo.count("R") == rules["decks"])
 
 
-def get_combo_rank(combo):
+def get_combo_rank(combo, rules=None):
     """ 
-    Takes a combo as an argument and returns a value representing its relative
+    Takes a combo and optional rules as arguments and returns a value representing its relative
     rank compared with other combos of that same combo type
     """
+    return _lookup_combo(combo, rules)[1]
+
+def _classify_combo_rank(combo, rules=None):
+    """ 
+    Takes a combo and optional rules as arguments and works out its combo rank from the is_* checks,
+    without the combo table
+    """
     if is_single(combo):
         return get_rank(combo[0]) # assumes list of one value
     elif is_sequence_of_singles(combo):
@@ -488,7 +753,7 @@ def get_combo_rank(combo):
                 triplet_ranks.append(rank)
         sorted_triplet_ranks = sorted_cards(triplet_ranks)
         return get_rank(sorted_triplet_ranks[0]) # examines first element in sorted list
-    elif is_quad_with_two_singles(combo):
+    elif is_quad_with_two_singles(combo, rules):
         rank_counts = {}
         for card in combo: # put combo into a dictionary representing frequency of each card 
             if card not in rank_counts:
@@ -500,7 +765,7 @@ def get_combo_rank(combo):
             if rank_counts[rank] == 4: 
                 quad_rank = rank
         return get_rank(quad_rank)    
-    elif is_quad_with_two_pairs(combo):
+    elif is_quad_with_two_pairs(combo, rules):
         rank_counts = {}
         for card in combo: # put combo into a dictionary representing frequency of each card 
             if card not in rank_counts:
@@ -512,98 +777,114 @@ def get_combo_rank(combo):
             if rank_counts[rank] == 4: 
                 quad_rank = rank
         return get_rank(quad_rank) 
-    elif is_bomb(combo):
-        return get_rank(combo[0]) # assumes list of four identical values
-    elif is_rocket(combo):
+    elif is_bomb(combo, rules):
+        if rules is not None and rules["bomb_ranking"] == "size": # bigger bombs beat smaller bombs of any rank
+            return (len(combo) - 4) * len(RANK_ORDER) + get_rank(combo[0])
+        return get_rank(combo[0]) # assumes list of identical values
+    elif is_rocket(combo, rules):
         return len(RANK_ORDER) # assign arbitrary "high value", but only one instance of this combo exists anyway
     else:
         return None # invalid combo
     
-def is_playable(played_combo, playing_combo):
+def is_playable(played_combo, playing_combo, rules=None):
     """ 
-    Takes a played combo and a playing combo as arguments and returns True if the playing combo
+    Takes a played combo, a playing combo and optional rules as arguments and returns True if the playing combo
     beats the played combo (and is therefore playable), False otherwise
     """
-    if get_combo_type(playing_combo) == "invalid combo": # check that playing combo is valid
+    if get_combo_type(playing_combo, rules) == "invalid combo": # check that playing combo is valid
         return False
     if played_combo is None: # special case where we start with no combo played yet (a "new round")
         return True
-    if is_rocket(played_combo): # special case: if rocket was played, nothing beats it
+    if is_rocket(played_combo, rules): # special case: if rocket was played, nothing beats it
         return False
-    if is_rocket(playing_combo): # special case: rocket beats everything
+    if is_rocket(playing_combo, rules): # special case: rocket beats everything
         return True
-    if is_bomb(playing_combo): # special case: if playing_combo is a bomb
-        if not is_bomb(played_combo): # if played_combo is not a bomb
+    if is_bomb(playing_combo, rules): # special case: if playing_combo is a bomb
+        if not is_bomb(played_combo, rules): # if played_combo is not a bomb
             return True
         else: # played_combo is also a bomb
-            return (get_combo_rank(playing_combo) > get_combo_rank(played_combo))
+            return (get_combo_rank(playing_combo, rules) > get_combo_rank(played_combo, rules))
     # at this point, neither combo is a rocket nor bomb (both combos are "regular" types) 
     # check that the played combo is the same type and same amount of cards as the played combo
-    if (get_combo_type(played_combo) == get_combo_type(playing_combo)) and (len(played_combo) == len(playing_combo)): 
-        return (get_combo_rank(playing_combo) > get_combo_rank(played_combo))
+    if (get_combo_type(played_combo, rules) == get_combo_type(playing_combo, rules)) and (len(played_combo) == len(playing_combo)): 
+        return (get_combo_rank(playing_combo, rules) > get_combo_rank(played_combo, rules))
     else: # the combo to be played is not in the same category as the played combo or not the same amount of cards, so cannot play 
         return False
     
-def get_combos(hand, combo_type): 
+def _find_sequences(hand_dict, needed, possible_lengths):
+    """ 
+    Takes a dictionary representing the frequency of each card in a hand, the number of cards needed of each
+    rank and the possible sequence lengths as arguments and returns every sequence window (a tuple of ranks)
+    the hand can form, ordered by length and then by rank
+    """
+    ranks_mask = 0
+    for rank in hand_dict: # get a bitmask of all ranks with enough cards
+        if hand_dict[rank] >= needed:
+            ranks_mask |= 1 << _RANK_INDEXES[rank]
+    sequences = []
+    for start, length in _find_runs(ranks_mask, possible_lengths):
+        sequences.append(RANK_ORDER[start : (start + length)])
+    return sequences
+
+def get_combos(hand, combo_type, rules=None): 
     """ 
-    Takes a player's hand and a specified combo type as arguments and returns all the possible
+    Takes a player's hand, a specified combo type and optional rules as arguments and returns all the possible
     combos of the specified combo type from the hand in sorted order 
     """
-    for card in hand: # check for invalid cards
-        if card not in RANK_ORDER: 
-            raise ValueError("invalid card in hand")
-    combos = [] # initialize all possible combos of indicated combo type
-    hand_dict = {}
-    for card in hand: # put hand into a dictionary representing frequency of each card
-        if card not in hand_dict:
-            hand_dict[card] = 1
-        else:
-            hand_dict[card] += 1
+    return list(iter_combos(hand, combo_type, rules))
+
+def iter_combos(hand, combo_type, rules=None):
+    """ 
+    Takes a player's hand, a specified combo type and optional rules as arguments and returns an iterator over all the
+    possible combos of the specified combo type from the hand in sorted order (the same order as get_combos).
+    Combos are only built as they are requested, so callers that stop at the first suitable combo
+    never pay for the rest, which matters for the many attachment choices of kicker combos.
+    """
+    if not isinstance(hand, Hand): # a Hand only holds valid cards
+        for card in hand: # check for invalid cards (done eagerly so errors are raised here, not on first use)
+            if card not in RANK_ORDER: 
+                raise ValueError("invalid card in hand")
+    if rules is None:
+        rules = STANDARD_RULES
+    return _generate_combos(hand, combo_type, rules)
+
+def _generate_combos(hand, combo_type, rules):
+    """ 
+    Generator behind iter_combos, which has already validated the hand
+    """
+    hand_dict = _count_cards(hand) # frequency of each card
     if combo_type == "single":
         for rank in sorted_cards(list(hand_dict.keys())): # iterate in sorted order
             found_combo = [rank]
-            combos.append(found_combo)
-        return combos
+            yield found_combo
+        return
     elif combo_type == "sequence of singles":
-        ranks_set = set(hand_dict.keys()) # get ranks of hand as as set
         possible_lengths = (5, 6, 7, 8, 9, 10, 11, 12) # check all possible lengths of a sequence of singles
-        for length in possible_lengths: # check all possible lengths in order of smallest length to largest length
-            for i in range((len(RANK_ORDER) - 3) - length + 1): # check all possible sequences given a length, 2's and Jokers not allowed, off-by-one for range() function
-                sequence_window = RANK_ORDER[i : (i + length)] # get needed ranks for the candidate sequence
-                sequence_window_set = set(sequence_window)
-                if sequence_window_set.issubset(ranks_set): # check if hand contains candidate sequence ranks
-                    found_combo = list(sequence_window) # should be in sorted order already
-                    combos.append(found_combo)
-        return combos
+        for sequence_window in _find_sequences(hand_dict, 1, possible_lengths): # in order of smallest length to largest length
+            found_combo = list(sequence_window) # should be in sorted order already
+            yield found_combo
+        return
     elif combo_type == "pair": 
         for rank in sorted_cards(list(hand_dict.keys())): # iterate in sorted order
             if hand_dict[rank] >= 2 : # if there are at least two of the value
                 found_combo = [rank, rank]
-                combos.append(found_combo)
-        return combos
+                yield found_combo
+        return
     elif combo_type == "sequence of pairs": 
-        pairs_ranks_set = set()
-        for rank in hand_dict: # get all ranks that would constitute a pair
-            if hand_dict[rank] >= 2:
-                pairs_ranks_set.add(rank)
         possible_lengths = (3, 4, 5, 6, 7, 8, 9, 10, 11, 12) # check all possible lengths of a sequence of pairs
-        for length in possible_lengths: # check all possible lengths in order of smallest length to largest length
-            for i in range((len(RANK_ORDER) - 3) - length + 1): # check all possible sequences given a length, 2's and Jokers not allowed, off-by-one for range() function
-                sequence_window = RANK_ORDER[i : (i + length)] # get needed ranks for the candidate sequence
-                sequence_window_set = set(sequence_window)
-                if sequence_window_set.issubset(pairs_ranks_set): # check if hand contains candidate sequence ranks
-                    found_combo = []
-                    for rank in sequence_window: # get valid combo values, should be in sorted order already
-                        for j in range(2):
-                            found_combo.append(rank) # re-create the valid combo with all the individual cards
-                    combos.append(found_combo)
-        return combos
+        for sequence_window in _find_sequences(hand_dict, 2, possible_lengths): # in order of smallest length to largest length
+            found_combo = []
+            for rank in sequence_window: # get valid combo values, should be in sorted order already
+                for j in range(2):
+                    found_combo.append(rank) # re-create the valid combo with all the individual cards
+            yield found_combo
+        return
     elif combo_type == "triplet": # need to check if contains at least three of a value
         for rank in sorted_cards(list(hand_dict.keys())): # iterate in sorted order
             if hand_dict[rank] >= 3:
                 found_combo = [rank, rank, rank]
-                combos.append(found_combo)
-        return combos
+                yield found_combo
+        return
     elif combo_type == "triplet with single": 
         triplet_ranks = []
         single_ranks = []
@@ -616,8 +897,8 @@ def get_combos(hand, combo_type):
             for single_rank in single_ranks:
                 if triplet_rank != single_rank:
                     found_combo = [triplet_rank, triplet_rank, triplet_rank, single_rank]
-                    combos.append(found_combo)
-        return combos
+                    yield found_combo
+        return
     elif combo_type == "triplet with pair": 
         triplet_ranks = []
         pair_ranks = []
@@ -630,38 +911,20 @@ def get_combos(hand, combo_type):
             for pair_rank in pair_ranks:
                 if triplet_rank != pair_rank:
                     found_combo = [triplet_rank, triplet_rank, triplet_rank, pair_rank, pair_rank]
-                    combos.append(found_combo)
-        return combos
+                    yield found_combo
+        return
     elif combo_type == "sequence of triplets":
-        triplets_ranks_set = set()
-        for rank in hand_dict: # get all ranks that would constitute a triplet
-            if hand_dict[rank] >= 3:
-                triplets_ranks_set.add(rank)
         possible_lengths = (2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12) # check all possible lengths of a sequence of triplets
-        for length in possible_lengths: # check all possible lengths in order of smallest length to largest length
-            for i in range((len(RANK_ORDER) - 3) - length + 1): # check all possible sequences given a length, 2's and Jokers not allowed, off-by-one for range() function
-                sequence_window = RANK_ORDER[i : (i + length)] # get needed ranks for the candidate sequence
-                sequence_window_set = set(sequence_window)
-                if sequence_window_set.issubset(triplets_ranks_set): # check if hand contains candidate sequence ranks
-                    found_combo = []
-                    for rank in sequence_window: # get valid combo values, should be in sorted order already
-                        for j in range(3):
-                            found_combo.append(rank) # re-create the valid combo with all the individual cards
-                    combos.append(found_combo)
-        return combos
+        for sequence_window in _find_sequences(hand_dict, 3, possible_lengths): # in order of smallest length to largest length
+            found_combo = []
+            for rank in sequence_window: # get valid combo values, should be in sorted order already
+                for j in range(3):
+                    found_combo.append(rank) # re-create the valid combo with all the individual cards
+            yield found_combo
+        return
     elif combo_type == "sequence of triplets with singles":
-        triplet_ranks_set = set()
-        for rank in hand_dict: # get all ranks that would constitute a triplet
-            if hand_dict[rank] >= 3:
-                triplet_ranks_set.add(rank)
-        sequence_of_triplets_list = [] # get a list of lists representing all valid sequences of triplets in "ranks form", expected be in sorted order when added to later on
         possible_lengths = (2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12) # check all possible lengths of a sequence of triplets
-        for length in possible_lengths: # check all possible lengths in order of smallest length to largest length
-            for i in range((len(RANK_ORDER) - 3) - length + 1): # check all possible sequences given a length, 2's and Jokers not allowed, off-by-one for range() function
-                sequence_window = RANK_ORDER[i : (i + length)] # get needed ranks for the candidate sequence
-                sequence_window_set = set(sequence_window)
-                if sequence_window_set.issubset(triplet_ranks_set): # if valid sequence of triplets found
-                    sequence_of_triplets_list.append(sequence_window) # append to our list of lists, should be in sorted order
+        sequence_of_triplets_list = _find_sequences(hand_dict, 3, possible_lengths) # all valid sequences of triplets in "ranks form", in sorted order
 
         singles_ranks_list = [] #  get a list of all valid singles in "ranks form", expected be in sorted order when added to later on
         for rank in sorted_cards(list(hand_dict.keys())): # iterate in sorted order
@@ -684,21 +947,11 @@ def get_combos(hand, combo_type):
                     for rank in attachment: # then attach the ranks of the possible attachment being considered
                         found_combo.append(rank)
                     if not ("B" in found_combo and "R" in found_combo): # exception: combos can't contain both Jokers as attachments
-                        combos.append(found_combo)
-        return combos
+                        yield found_combo
+        return
     elif combo_type == "sequence of triplets with pairs": 
-        triplet_ranks_set = set()
-        for rank in hand_dict: # get all ranks that would constitute a triplet
-            if hand_dict[rank] >= 3:
-                triplet_ranks_set.add(rank)
-        sequence_of_triplets_list = [] # get a list of lists representing all valid sequences of triplets in "ranks form", expected be in sorted order when added to later on
         possible_lengths = (2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12) # check all possible lengths of a sequence of triplets
-        for length in possible_lengths: # check all possible lengths in order of smallest length to largest length
-            for i in range((len(RANK_ORDER) - 3) - length + 1): # check all possible sequences given a length, 2's and Jokers not allowed, off-by-one for range() function
-                sequence_window = RANK_ORDER[i : (i + length)] # get needed ranks for the candidate sequence
-                sequence_window_set = set(sequence_window)
-                if sequence_window_set.issubset(triplet_ranks_set): # if valid sequence of triplets found
-                    sequence_of_triplets_list.append(sequence_window) # append to our list of lists, should be in sorted order
+        sequence_of_triplets_list = _find_sequences(hand_dict, 3, possible_lengths) # all valid sequences of triplets in "ranks form", in sorted order
 
         pairs_ranks_list = [] #  get a list of all valid pairs in "ranks form", expected be in sorted order when added to later on 
         for rank in sorted_cards(list(hand_dict.keys())): # iterate in sorted order
@@ -721,9 +974,11 @@ def get_combos(hand, combo_type):
                     for rank in attachment: # then attach the ranks of the possible attachment being considered
                         for k in range(2): # "j" was previously used, so we use "k" since using "j" would exist in same scope as previous "j" (scoping unit in Python is a function)
                             found_combo.append(rank)
-                    combos.append(found_combo)
-        return combos   
+                    yield found_combo
+        return
     elif combo_type == "quad with two singles":
+        if not rules["quad_attachments"]: # quads are always bombs in this variant
+            return
         quad_ranks = []
         singles_ranks = []
         for rank in sorted_cards(list(hand_dict.keys())): # iterate in sorted order
@@ -745,9 +1000,11 @@ def get_combos(hand, combo_type):
                     for rank in attachment: # then attach the ranks of the possible attachment being considered
                         found_combo.append(rank)
                     if not ("B" in found_combo and "R" in found_combo): # exception: combos can't contain both Jokers as attachments
-                        combos.append(found_combo)
-        return combos
+                        yield found_combo
+        return
     elif combo_type == "quad with two pairs":
+        if not rules["quad_attachments"]: # quads are always bombs in this variant
+            return
         quad_ranks = []
         pairs_ranks = []
         for rank in sorted_cards(list(hand_dict.keys())): # iterate in sorted order
@@ -769,59 +1026,226 @@ def get_combos(hand, combo_type):
                     for rank in attachment: # then attach the ranks of the possible attachment being considered
                         for j in range(2): # "i" was previously used, so we use "j" since using "i" would exist in same scope as previous "i" (scoping unit in Python is a function)
                             found_combo.append(rank)
-                    combos.append(found_combo)
-        return combos    
+                    yield found_combo
+        return
     elif combo_type == "bomb": 
-        for rank in sorted_cards(list(hand_dict.keys())): # iterate in sorted order
-            if hand_dict[rank] >= 4: # shouldn't have more than 4 of a card, but we use >= in case of future changes to game
-                found_combo = [rank, rank, rank, rank]
-                combos.append(found_combo)
-        return combos    
+        bomb_sizes = range(4, 4 * rules["decks"] + 1) # with more than one deck, bombs can use any number of copies from four up
+        if rules["bomb_ranking"] == "size": # iterate from the weakest bomb to the strongest: by size, then by rank
+            for size in bomb_sizes:
+                for rank in sorted_cards(list(hand_dict.keys())): 
+                    if hand_dict[rank] >= size and rank != "B" and rank != "R":
+                        found_combo = [rank] * size
+                        yield found_combo
+        else: # iterate in sorted order of rank, then size
+            for rank in sorted_cards(list(hand_dict.keys())): 
+                for size in bomb_sizes:
+                    if hand_dict[rank] >= size and rank != "B" and rank != "R":
+                        found_combo = [rank] * size
+                        yield found_combo
+        return
+    elif combo_type == "rocket": # every Joker in the deck
+        if hand_dict.get("B", 0) >= rules["decks"] and hand_dict.get("R", 0) >= rules["decks"]:
+            found_combo = ["B"] * rules["decks"] + ["R"] * rules["decks"]
+            yield found_combo
+        return
+    else: # unknown combo types have no combos
+        return
+
+def count_combos(hand, combo_type, rules=None):
+    """ 
+    Takes a player's hand, a specified combo type and optional rules as arguments and returns how many combos
+    get_combos would return, without building any of them
+    """
+    if rules is None:
+        rules = STANDARD_RULES
+    if not isinstance(hand, Hand): # a Hand only holds valid cards
+        for card in hand: # check for invalid cards
+            if card not in RANK_ORDER: 
+                raise ValueError("invalid card in hand")
+    hand_dict = _count_cards(hand) # frequency of each card
+    singles_count = len(hand_dict) # number of ranks that can be used as a single
+    pairs_count = 0 # number of ranks that can be used as a pair
+    for rank in hand_dict:
+        if hand_dict[rank] >= 2:
+            pairs_count += 1
+    has_both_jokers = "B" in hand_dict and "R" in hand_dict
+    if combo_type == "single":
+        return singles_count
+    elif combo_type == "sequence of singles":
+        return len(_find_sequences(hand_dict, 1, (5, 6, 7, 8, 9, 10, 11, 12)))
+    elif combo_type == "pair":
+        return pairs_count
+    elif combo_type == "sequence of pairs":
+        return len(_find_sequences(hand_dict, 2, (3, 4, 5, 6, 7, 8, 9, 10, 11, 12)))
+    elif combo_type == "triplet":
+        count = 0
+        for rank in hand_dict:
+            if hand_dict[rank] >= 3:
+                count += 1
+        return count
+    elif combo_type == "bomb":
+        count = 0
+        for rank in hand_dict:
+            if hand_dict[rank] >= 4 and rank != "B" and rank != "R": # one bomb per size from four cards up
+                count += min(hand_dict[rank], 4 * rules["decks"]) - 3
+        return count
+    elif combo_type == "triplet with single" or combo_type == "triplet with pair":
+        count = 0
+        for rank in hand_dict:
+            if hand_dict[rank] >= 3: # the triplet rank itself can't be used as its attachment
+                if combo_type == "triplet with single":
+                    count += singles_count - 1
+                else:
+                    count += pairs_count - 1
+        return count
+    elif combo_type == "sequence of triplets":
+        return len(_find_sequences(hand_dict, 3, (2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12)))
+    elif combo_type == "sequence of triplets with singles" or combo_type == "sequence of triplets with pairs":
+        count = 0
+        for sequence in _find_sequences(hand_dict, 3, (2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12)):
+            if combo_type == "sequence of triplets with singles":
+                count += comb(singles_count - len(sequence), len(sequence))
+                if has_both_jokers: # attachments can't contain both Jokers (Jokers are never in the sequence)
+                    count -= comb(singles_count - len(sequence) - 2, len(sequence) - 2)
+            else: # every rank in the sequence also counts as a pair rank
+                count += comb(pairs_count - len(sequence), len(sequence))
+        return count
+    elif combo_type == "quad with two singles" or combo_type == "quad with two pairs":
+        if not rules["quad_attachments"]: # quads are always bombs in this variant
+            return 0
+        count = 0
+        for rank in hand_dict:
+            if hand_dict[rank] >= 4: # the quad rank itself can't be used as an attachment
+                if combo_type == "quad with two singles":
+                    count += comb(singles_count - 1, 2)
+                    if has_both_jokers: # attachments can't be both Jokers
+                        count -= 1
+                else:
+                    count += comb(pairs_count - 1, 2)
+        return count
     elif combo_type == "rocket":
-        if "B" in hand_dict and "R" in hand_dict:
-            found_combo = ["B", "R"]
-            combos.append(found_combo)
-        return combos
-    else: # in this case, combos is an empty list
-        return combos 
+        if hand_dict.get("B", 0) >= rules["decks"] and hand_dict.get("R", 0) >= rules["decks"]:
+            return 1
+        return 0
+    else: # unknown combo types have no combos
+        return 0
 
-def get_computer_move(played_combo, hand):
+def get_computer_move(played_combo, hand, rules=None):
     """
-    Takes a played combo and a hand as arguments and returns a choice for the computer. 
+    Takes a played combo, a hand and optional rules as arguments and returns a choice for the computer. 
     It does not modify hand argument if a choice to play a combo is made. 
     Will either return a combo to be played or "pass" 
     """
     if len(hand) == 0: # check that hand is empty (game should be over if it reaches this)
         raise AssertionError("Hand is empty and should indicate end of game")
+    sampler = _metrics_sampler
+    if sampler is not None: # metrics are timing a decision, though it may be another thread's
+        sampler = sampler.for_current_thread()
     if played_combo is None: # case where playing on a new round, note that it plays a combo if possible rather than choosing to "pass"
         for combo_type in DEFINED_COMBOS: # iterate through defined combos
-            candidate_combos = get_combos(hand, combo_type) # look for combos of the combo type being considered 
-            if len(candidate_combos) != 0: # found candidate combos
-                playing_combo = candidate_combos[0] # pick the first candidate combo as the combo to be played
-                return playing_combo
+            candidate_combos = iter_combos(hand, combo_type, rules)
+            if sampler is not None:
+                candidate_combos = sampler.time_combos(candidate_combos)
+            for candidate_combo in candidate_combos: # look for combos of the combo type being considered 
+                return candidate_combo # pick the first candidate combo as the combo to be played
     else: # case where we are playing on a player's combo that has been played last turn 
-        combo_type = get_combo_type(played_combo) # get the type of combo that was played
-        candidate_combos = get_combos(hand, combo_type) # get all the possible combos of the specified combo type from the hand
-        if combo_type != "bomb": # in the case where the played combo is not a bomb
-            for combo in get_combos(hand, "bomb"): # if hand contains bombs, append it to candidate_combos
-                candidate_combos.append(combo)
-        if combo_type != "rocket": # in the case where the played combo is not a rocket
-            for combo in get_combos(hand, "rocket"): # if hand contains a rocket, append it to candidate_combos
-                candidate_combos.append(combo)
-        if len(candidate_combos) != 0: # if there are any candidate combos that can be played, including bombs or rocket (if any)
-            for candidate_combo in candidate_combos: # iterate over the list of candidate combos 
-                if is_playable(played_combo, candidate_combo): # check if the given candidate combo can be played
+        combo_type = get_combo_type(played_combo, rules) # get the type of combo that was played
+        candidate_types = [combo_type] # look at combos of the specified combo type from the hand first
+        if combo_type != "bomb": # in the case where the played combo is not a bomb, bombs are candidates too
+            candidate_types.append("bomb")
+        if combo_type != "rocket": # in the case where the played combo is not a rocket, the rocket is a candidate too
+            candidate_types.append("rocket")
+        for candidate_type in candidate_types:
+            candidate_combos = iter_combos(hand, candidate_type, rules)
+            if sampler is not None:
+                candidate_combos = sampler.time_combos(candidate_combos)
+            for candidate_combo in candidate_combos: # combos are built lazily, so we stop at the first playable one
+                if candidate_type == combo_type and combo_type != "bomb" and len(candidate_combo) != len(played_combo):
+                    continue # regular combos must match the played combo's length, so skip checking these
+                if sampler is None:
+                    playable = is_playable(played_combo, candidate_combo, rules)
+                else:
+                    playable = sampler.time_is_playable(played_combo, candidate_combo, rules)
+                if playable: # check if the given candidate combo can be played
                     playing_combo = candidate_combo # found playable combo, pick it to be played
                     return playing_combo
-            return "pass" # found candidate combos, but they were not playable, so computer must choose to "pass"
-        else: # no candidate combos of the specified combo type were found, so computer must choose to "pass"
-            return "pass"                   
+        return "pass" # no candidate combos could be played, so computer must choose to "pass"
+
+def get_legal_moves(played_combo, hand, rules=None):
+    """
+    Takes a played combo (None on a new round), a hand and optional rules as arguments and returns a dictionary
+    of every combo from the hand that can be played, keyed by its packed card counts (see _combo_key), so a
+    move can be checked against it in constant time whatever order its cards are in.
+    Only the combo types that could be played are generated: any type on a new round, otherwise the played
+    combo's type (of the same length), bombs and the rocket.
+    """
+    if played_combo is None: # any combo can start a new round
+        candidate_types = DEFINED_COMBOS
+        combo_type = None
+    else:
+        combo_type = get_combo_type(played_combo, rules)
+        candidate_types = [combo_type]
+        if combo_type != "bomb":
+            candidate_types.append("bomb")
+        if combo_type != "rocket":
+            candidate_types.append("rocket")
+    legal_moves = {}
+    for candidate_type in candidate_types:
+        for candidate_combo in iter_combos(hand, candidate_type, rules):
+            if played_combo is not None:
+                if candidate_type == combo_type and combo_type != "bomb" and len(candidate_combo) != len(played_combo):
+                    continue # regular combos must match the played combo's length
+                if not is_playable(played_combo, candidate_combo, rules):
+                    continue
+            legal_moves[_combo_key(candidate_combo)] = candidate_combo
+    return legal_moves
+
+def _hint_sort_key(combo, hand_dict, rules=None):
+    """
+    Takes a combo, the frequency dictionary of the hand it comes from and optional rules as arguments and
+    returns a sort key for hints, so better suggestions sort first: combos that aren't bombs or the rocket,
+    then combos that don't split up a bomb or the rocket, then the lowest ranked, then the longest
+    (gets rid of the most cards), then the lowest cards overall (so low attachments come first)
+    """
+    combo_type, combo_rank = _lookup_combo(combo, rules)
+    is_bomb_or_rocket = combo_type == "bomb" or combo_type == "rocket"
+    breaks_bomb_or_rocket = False
+    rank_total = 0
+    for card in combo:
+        rank_total += _RANK_INDEXES[card]
+        if not is_bomb_or_rocket:
+            if card == "B" or card == "R": # using a Joker on its own splits up the rocket
+                if "B" in hand_dict and "R" in hand_dict:
+                    breaks_bomb_or_rocket = True
+            elif hand_dict[card] >= 4: # using part of a bomb splits it up
+                breaks_bomb_or_rocket = True
+    return (is_bomb_or_rocket, breaks_bomb_or_rocket, combo_rank, -len(combo), rank_total)
+
+def get_hints(played_combo, hand, limit=None, rules=None, legal_moves=None):
+    """
+    Takes a played combo (None on a new round), a hand, an optional maximum number of hints, optional rules and
+    optionally the legal moves already found by get_legal_moves as arguments and returns the combos that can be
+    played, best suggestion first (see _hint_sort_key). An empty list means the only move is to "pass".
+    """
+    if legal_moves is None:
+        legal_moves = get_legal_moves(played_combo, hand, rules)
+    hand_dict = {}
+    for card in hand: # put hand into a dictionary representing frequency of each card
+        if card not in hand_dict:
+            hand_dict[card] = 1
+        else:
+            hand_dict[card] += 1
+    hints = sorted(legal_moves.values(), key=lambda combo: _hint_sort_key(combo, hand_dict, rules))
+    if limit is not None:
+        hints = hints[:limit]
+    return hints
 
 def get_player_move(played_combo, hand):
     """
     Takes a played combo and a hand as arguments and returns a choice for the user based on user input. 
     It does not modify hand argument if a choice to play a combo is made. 
     Will either return a combo to be played or "pass" based on user input. 
+    The legal moves are found once up front, so checking each input (or asking for a "hint") is quick.
     """
     if len(hand) == 0: # check that hand is empty (game should be over if it reaches this)
         raise AssertionError("Hand is empty and should indicate end of game")
@@ -830,9 +1254,16 @@ def get_player_move(played_combo, hand):
     else: # playing on an already played combo
         print(f"\tIt is now your turn. The last played combo is: {played_combo} ({get_combo_type(played_combo)})")
     print(f"\tYour hand: {hand}")
+    legal_moves = get_legal_moves(played_combo, hand) # every combo the user could play, keyed by packed card counts
+    hand_dict = {}
+    for card in hand: # put hand into a dictionary representing frequency of each card
+        if card not in hand_dict:
+            hand_dict[card] = 1
+        else:
+            hand_dict[card] += 1
     user_move = None
     while user_move is None: # input-validation loop
-        user_input = input("\tPlease input your cards separated by spaces or pass (e.g., \"3 3\", \"10 J Q K A\", \"B R\", \"pass\"): ")
+        user_input = input("\tPlease input your cards separated by spaces, pass or hint (e.g., \"3 3\", \"10 J Q K A\", \"B R\", \"pass\", \"hint\"): ")
         user_choice = user_input.strip()
 
         if (user_choice.lower() == "pass"): # user chooses to pass
@@ -840,6 +1271,12 @@ def get_player_move(played_combo, hand):
                 print("\tCannot pass on a new round. Must play a combo.")
             else: # not a new round, valid to choose "pass"
                 user_move = "pass"
+        elif (user_choice.lower() == "hint"): # user asks for suggestions
+            hints = get_hints(played_combo, hand, 5, legal_moves=legal_moves)
+            if len(hints) == 0:
+                print("\t\tNo combo in your hand beats the last played combo, so you must pass.")
+            else:
+                print(f"\t\tSuggested moves: {hints}")
         else: # user inputs cards
             user_combo = user_choice.upper().split()
 
@@ -856,61 +1293,171 @@ def get_player_move(played_combo, hand):
                     all_valid_cards_in_combo = False
                     invalid_cards.append(card)
 
+            # a legal move needs no further checks, otherwise work out what is wrong with it
+            is_legal_move = is_nonempty and all_valid_cards_in_combo and _combo_key(user_combo) in legal_moves
+
             # check that the inputted cards are actually all contained in the hand
-            hand_contains_all_cards = True
             uncontained_cards = []
-            if all_valid_cards_in_combo: # we use this if statement because this block raises ValueError if an invalid card is found
+            if not is_legal_move and all_valid_cards_in_combo: 
                 user_combo_dict = {}
                 for card in user_combo: # put user combo into a dictionary representing frequency of each card
                     if card not in user_combo_dict:
                         user_combo_dict[card] = 1
                     else:
                         user_combo_dict[card] += 1
-                hand_dict = {}
-                for card in hand: # put hand into a dictionary representing frequency of each card
-                    if card not in hand_dict:
-                        hand_dict[card] = 1
-                    else:
-                        hand_dict[card] += 1
                 for card in sorted_cards(list(user_combo_dict.keys())): # iterate in sorted order
-                    if card not in hand_dict: # hand doesn't contain the card
-                        for i in range(user_combo_dict[card]): # update uncontained cards
-                            uncontained_cards.append(card) 
-                    else: # hand contains the card
-                        if hand_dict[card] < user_combo_dict[card]: # hand doesn't contain enough specified cards
-                            for i in range(user_combo_dict[card] - hand_dict[card]):
-                                uncontained_cards.append(card)
-                if len(uncontained_cards) != 0:
-                    hand_contains_all_cards = False
-
-            # check that the inputted cards don't form an invalid combo
-            valid_combo = True
-            if get_combo_type(user_combo) == "invalid combo":
-                valid_combo = False
-            
-            # check that the inputted cards are actually playable (beat the played combo)
-            playable_combo = True
-            if not is_playable(played_combo, user_combo):
-                playable_combo = False
-
-            if not is_nonempty:
+                    if user_combo_dict[card] > hand_dict.get(card, 0): # hand doesn't contain enough specified cards
+                        for i in range(user_combo_dict[card] - hand_dict.get(card, 0)):
+                            uncontained_cards.append(card)
+
+            if is_legal_move:
+                user_move = user_combo
+            elif not is_nonempty:
                 print("\t\tNo cards entered.")
             elif not all_valid_cards_in_combo: 
                 print(f"\t\tInvalid cards found: {invalid_cards}")
-            elif not hand_contains_all_cards:
+            elif len(uncontained_cards) != 0:
                 print(f"\t\tHand doesn't contain enough of following cards: {uncontained_cards}")
-            elif not valid_combo:
+            elif get_combo_type(user_combo) == "invalid combo":
                 print("\t\tGiven cards do not form a valid combo.")
-            elif not playable_combo:
+            else: # a valid combo from the hand that isn't a legal move can't beat the played combo
                 print(f"\t\tYour combo does not beat the last played combo. Must match shape/length (unless bomb/rocket) and be higher ranked.")  
-            else: 
-                user_move = user_combo
     return user_move
 
-def remove_combo_from_hand(combo, hand):
+class Hand(list):
+    """
+    A hand that keeps its cards sorted (in RANK_ORDER) and counted by rank, so cards left, "contains combo",
+    combo removal and putting a combo back (rollback) only cost as much as the combo's size.
+    It is a list, so it can be passed anywhere a hand is expected (and saved as JSON), but it can only be
+    changed through remove_combo and add_combo, which keep the counts right: the other list methods that
+    change a list raise TypeError, so move functions can read a Hand but not change it by mistake.
+    """
+
+    def __init__(self, cards=()):
+        counts = [0] * len(RANK_ORDER) # number of cards of each rank, in RANK_ORDER
+        for card in cards:
+            index = _RANK_INDEXES.get(card)
+            if index is None: # check for invalid cards
+                raise ValueError("invalid card found")
+            counts[index] += 1
+        super().__init__()
+        for index in range(len(RANK_ORDER)): # lay the cards out in sorted order
+            list.extend(self, [RANK_ORDER[index]] * counts[index])
+        self.counts = counts
+
+    def _unsupported_change(self, *args, **kwargs):
+        """
+        Stands in for the list methods that would change the cards without updating the counts
+        """
+        raise TypeError("a Hand can only be changed through remove_combo and add_combo")
+
+    append = extend = insert = pop = remove = clear = sort = reverse = _unsupported_change
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _unsupported_change
+
+    def __copy__(self):
+        return Hand(self) # a copy gets its own counts
+
+    def __deepcopy__(self, memo):
+        return Hand(self)
+
+    def __reduce__(self):
+        return (Hand, (list(self),)) # pickle through the constructor, since extend and append are unsupported
+
+    @property
+    def cards_left(self):
+        """
+        Number of cards left in the hand
+        """
+        return len(self)
+
+    def rank_counts(self):
+        """
+        Returns a dictionary representing the frequency of each card in the hand, in sorted order
+        """
+        hand_dict = {}
+        for index in range(len(RANK_ORDER)):
+            if self.counts[index] > 0:
+                hand_dict[RANK_ORDER[index]] = self.counts[index]
+        return hand_dict
+
+    def _combo_counts(self, combo):
+        """
+        Takes a combo as an argument and returns a dictionary of how many cards of each rank index it has
+        """
+        combo_counts = {}
+        for card in combo:
+            index = _RANK_INDEXES.get(card)
+            if index is None: # check for invalid cards
+                raise ValueError("invalid card found")
+            combo_counts[index] = combo_counts.get(index, 0) + 1
+        return combo_counts
+
+    def contains_combo(self, combo):
+        """
+        Takes a combo as an argument and returns whether the hand contains all of its cards
+        """
+        for index, count in self._combo_counts(combo).items():
+            if self.counts[index] < count:
+                return False
+        return True
+
+    def remove_combo(self, combo, trusted=False):
+        """
+        Takes a combo and whether it is trusted (e.g. produced by the move generator from this hand) as arguments
+        and removes the combo's cards from the hand. Untrusted combos are checked first, and the hand is left
+        unchanged if they are invalid or not contained in the hand.
+        """
+        combo_counts = self._combo_counts(combo)
+        if not trusted:
+            uncontained_cards = []
+            for index in sorted(combo_counts): # iterate in sorted order
+                if self.counts[index] < combo_counts[index]: # hand doesn't contain enough specified cards
+                    uncontained_cards.extend([RANK_ORDER[index]] * (combo_counts[index] - self.counts[index]))
+            if len(uncontained_cards) != 0:
+                raise ValueError(f"Hand does not contain all cards in combo; missing: {uncontained_cards}")
+        for index in sorted(combo_counts, reverse=True): # highest ranks first, so lower ranks' positions don't move
+            start = sum(self.counts[:index]) # cards of lower ranks come first
+            list.__delitem__(self, slice(start, start + combo_counts[index]))
+            self.counts[index] -= combo_counts[index]
+
+    def add_combo(self, combo):
+        """
+        Takes a combo as an argument and puts its cards back into the hand in sorted order (undoes remove_combo)
+        """
+        combo_counts = self._combo_counts(combo)
+        for index in sorted(combo_counts, reverse=True): # highest ranks first, so lower ranks' positions don't move
+            end = sum(self.counts[: index + 1]) # after the cards of this rank already in the hand
+            list.__setitem__(self, slice(end, end), [RANK_ORDER[index]] * combo_counts[index])
+            self.counts[index] += combo_counts[index]
+
+def _count_cards(hand):
+    """
+    Takes a hand as an argument and returns a dictionary representing the frequency of each card in it
+    (a Hand already keeps these counts)
+    """
+    if isinstance(hand, Hand):
+        return hand.rank_counts()
+    hand_dict = {}
+    for card in hand: # put hand into a dictionary representing frequency of each card
+        if card not in hand_dict:
+            hand_dict[card] = 1
+        else:
+            hand_dict[card] += 1
+    return hand_dict
+
+def remove_combo_from_hand(combo, hand, trusted=False):
     """
-    Takes a combo and a hand as arguments and modifies hand in place by removing combo from it.
+    Takes a combo, a hand and whether the combo is trusted (e.g. produced by the move generator from this hand)
+    as arguments and modifies hand in place by removing combo from it. Trusted combos skip the checks.
+    A Hand removes the combo in time proportional to the combo's size.
     """
+    if isinstance(hand, Hand):
+        hand.remove_combo(combo, trusted)
+        return
+    if trusted:
+        for card in combo:
+            hand.remove(card)
+        return
     for card in combo: # check for invalid cards in combo
         if card not in RANK_ORDER: 
             raise ValueError("invalid card found")
@@ -943,6 +1490,234 @@ def remove_combo_from_hand(combo, hand):
     for card in combo:
         hand.remove(card)
 
+# establishes the types of events the game engine emits, in the order they can happen
+EVENT_TYPES = ("game start", "play", "pass", "round end", "game over")
+
+class EventBus:
+    """
+    Delivers game events (dictionaries with a "type" from EVENT_TYPES) to subscribed renderers.
+    The engine only builds events when a bus has subscribers, so a game without renderers runs at full speed.
+    """
+
+    def __init__(self, *renderers):
+        self.subscribers = []
+        for renderer in renderers:
+            self.subscribe(renderer)
+
+    def subscribe(self, renderer):
+        """
+        Takes a renderer (any callable taking an event) as an argument and delivers future events to it.
+        A NullRenderer is never subscribed, so it costs nothing.
+        """
+        if not isinstance(renderer, NullRenderer):
+            self.subscribers.append(renderer)
+
+    def emit(self, event):
+        """
+        Takes an event as an argument and delivers it to every subscribed renderer in order
+        """
+        for renderer in self.subscribers:
+            renderer(event)
+
+class NullRenderer:
+    """
+    Renderer that ignores every event, for headless games
+    """
+
+    def __call__(self, event):
+        pass
+
+class ConsoleRenderer:
+    """
+    Renderer that prints the game like the interactive command line game, waiting pacing seconds
+    before most messages so a human can follow along (plays by the seats in unpaced_seats are shown at once)
+    """
+
+    def __init__(self, pacing=0.0, unpaced_seats=()):
+        self.pacing = pacing
+        self.unpaced_seats = tuple(unpaced_seats)
+
+    def _pause(self):
+        if self.pacing > 0:
+            time.sleep(self.pacing)
+
+    def __call__(self, event):
+        if event["type"] == "game start":
+            print(f"Game start. {event['seat'].title()} starts game.")
+            print()
+        elif event["type"] == "play":
+            if event["seat"] not in self.unpaced_seats:
+                self._pause()
+            print(f"{event['seat'].title()} plays: {event['combo']} ({event['combo_type']}) [cards left: {event['cards_left']}]")
+        elif event["type"] == "pass":
+            self._pause()
+            print(f"{event['seat'].title()} passes")
+        elif event["type"] == "round end":
+            self._pause()
+            print("End of round. Starting new round.")
+            print()
+        elif event["type"] == "game over":
+            self._pause()
+            print()
+            print("Game is over")
+            print(f"Winner: {event['winner'].title()}")
+            if event["winning_side"] == "landlord":
+                print("Landlord wins")
+            else:
+                print("Peasants win")
+
+class JsonLinesRenderer:
+    """
+    Renderer that writes every event to a file as one line of JSON
+    """
+
+    def __init__(self, file):
+        self.file = file
+
+    def __call__(self, event):
+        self.file.write(json.dumps(event) + "\n")
+
+def new_game_state(hands, rules=None, seats=None):
+    """
+    Takes hands (one per seat, in turn order), optional rules and optional seat names (get_seats by default)
+    as arguments and returns the state of a new game as a dictionary of lists (the hands are sorted Hand lists),
+    numbers, strings and the rules dictionary, so it can be serialized as JSON. It does not modify the hands
+    argument, so the same deal can be replayed.
+    """
+    if rules is None:
+        rules = STANDARD_RULES
+    if seats is None:
+        seats = get_seats(rules)
+    if len(hands) != rules["seats"] or len(seats) != rules["seats"]:
+        raise ValueError("a game expects one hand and one seat name per seat")
+    return {"rules": rules, # the rules themselves, so custom rules work too (see get_game_rules)
+            "seats": list(seats), # the first seat is the landlord
+            "hands": [Hand(hand) for hand in hands], # copy hands so callers can replay the same deal
+            "current_index": 0, # landlord starts game
+            "last_played_combo": None,
+            "passes_in_a_row": 0,
+            "moves": 0,
+            "bombs": 0,
+            "combo_counts": {},
+            "winner": None}
+
+def get_game_rules(state):
+    """
+    Takes a game state as an argument and returns its rules. A state loaded back from JSON holds a copy of its
+    rules (or only their name, in older saved states), so registered rules are swapped back in for the original
+    dictionary, which keeps the fast paths that check for STANDARD_RULES by identity.
+    """
+    rules = state["rules"]
+    if isinstance(rules, str): # saved by an older version, which stored the name of registered rules
+        rules = RULES[rules]
+        state["rules"] = rules
+        return rules
+    registered_rules = RULES.get(rules["name"])
+    if rules is not registered_rules and rules == registered_rules: # an equal copy of registered rules
+        rules = registered_rules
+        state["rules"] = rules
+    return rules
+
+def step_game(state, move_functions, event_bus=None):
+    """
+    Takes a game state from new_game_state, move functions (one per seat, in turn order) and an optional
+    EventBus as arguments and plays the current player's move, modifying the state in place and emitting
+    "play" or "pass", "round end" and "game over" events.
+    Each move function is called like get_computer_move with the played combo and hand; for rules other than
+    the standard ones, bind the rules first (e.g. functools.partial(get_computer_move, rules=TWO_DECK_RULES)).
+    Move functions with a true "takes_game_state" attribute are also given the state as a game_state keyword
+    argument (they must not modify it).
+    Returns the move that was made.
+    """
+    if state["winner"] is not None:
+        raise ValueError("game is already over")
+    rules = get_game_rules(state)
+    seats = state["seats"]
+    if event_bus is not None and not event_bus.subscribers: # nobody is listening, so don't build events
+        event_bus = None
+    current_index = state["current_index"]
+    seat = seats[current_index]
+    hand = state["hands"][current_index]
+    if not isinstance(hand, Hand): # e.g. a game state loaded back from JSON
+        hand = Hand(hand)
+        state["hands"][current_index] = hand
+    move_function = move_functions[current_index]
+    if getattr(move_function, "takes_game_state", False): # e.g. players that look at the other hands' sizes
+        move = move_function(state["last_played_combo"], hand, game_state=state)
+    else:
+        move = move_function(state["last_played_combo"], hand)
+    state["moves"] += 1
+    if move == "pass": # player chose to pass
+        if state["last_played_combo"] is None:
+            raise ValueError(f"{seat} cannot pass on a new round")
+        state["passes_in_a_row"] += 1
+        if event_bus is not None:
+            event_bus.emit({"type": "pass", "seat": seat})
+        if state["passes_in_a_row"] == len(seats) - 1: # everyone else passed, so start a new round
+            state["last_played_combo"] = None
+            state["passes_in_a_row"] = 0
+            if event_bus is not None:
+                event_bus.emit({"type": "round end", "next_seat": seats[(current_index + 1) % len(seats)]})
+    else: # player chose to play a combo
+        if not is_playable(state["last_played_combo"], move, rules):
+            raise ValueError(f"{seat} made an illegal move: {move}")
+        hand.remove_combo(move) # still checks that the hand holds the cards, in time proportional to the combo
+        combo_type = get_combo_type(move, rules)
+        if combo_type not in state["combo_counts"]:
+            state["combo_counts"][combo_type] = 1
+        else:
+            state["combo_counts"][combo_type] += 1
+        if combo_type == "bomb" or combo_type == "rocket": # rockets are counted as bombs
+            state["bombs"] += 1
+        state["last_played_combo"] = list(move)
+        state["passes_in_a_row"] = 0
+        if event_bus is not None:
+            event_bus.emit({"type": "play", "seat": seat, "combo": list(move), "combo_type": combo_type, "cards_left": len(hand)})
+        if len(hand) == 0: # check win condition
+            state["winner"] = seat
+            if event_bus is not None:
+                event_bus.emit(dict(get_game_result(state), type="game over"))
+    if state["winner"] is None: # move to next player
+        state["current_index"] = (current_index + 1) % len(seats)
+    return move
+
+def get_game_result(state):
+    """
+    Takes the state of a finished game as an argument and returns a dictionary describing the result
+    """
+    if state["winner"] is None:
+        raise ValueError("game is not over yet")
+    cards_left = []
+    for hand in state["hands"]:
+        cards_left.append(len(hand))
+    if state["winner"] == state["seats"][0]: # the first seat is the landlord
+        winning_side = "landlord"
+    else:
+        winning_side = "peasants"
+    return {"winner": state["winner"], 
+            "winning_side": winning_side, 
+            "moves": state["moves"], 
+            "bombs": state["bombs"], 
+            "combo_counts": dict(state["combo_counts"]), 
+            "cards_left": cards_left}
+
+def play_game(hands, move_functions, rules=None, seats=None, event_bus=None):
+    """
+    Takes hands and move functions (one of each per seat, in turn order), optional rules, optional seat names
+    and an optional EventBus as arguments and plays a game, emitting a "game start" event and then the
+    events of every move (see step_game). Without an event bus (or with only NullRenderers) nothing is printed.
+    It does not modify the hands argument, so the same deal can be replayed.
+    Returns a dictionary describing the result of the game.
+    """
+    state = new_game_state(hands, rules, seats)
+    if len(move_functions) != len(state["hands"]):
+        raise ValueError("play_game expects one move function per seat")
+    if event_bus is not None and event_bus.subscribers:
+        event_bus.emit({"type": "game start", "seat": state["seats"][0], "seats": list(state["seats"]), 
+                        "cards": [len(hand) for hand in state["hands"]], "rules": state["rules"]["name"]})
+    while state["winner"] is None:
+        step_game(state, move_functions, event_bus)
+    return get_game_result(state)
 
 if __name__ == "__main__":
     """ 
@@ -953,87 +1728,13 @@ if __name__ == "__main__":
     hand_1, hand_2, hand_3, leftovers = deal_hands_with_leftovers(deck) # deal cards
     for card in leftovers: # automatically give leftovers pile to landlord (hand_3) - skipping bidding phase 
         hand_3.append(card)
-    hand_1 = sorted_cards(hand_1) # sorts user's hand for easier viewing
+
+    def get_paced_player_move(played_combo, hand):
+        time.sleep(1) # give the user a moment to read the other players' moves
+        return get_player_move(played_combo, hand)
 
     turn_order = ("landlord", "user", "peasant")
-    current_player = "landlord" 
-    last_played_combo = None
-    passes_in_a_row = 0
-    winner = None
-
-    print("Game start. Landlord starts game.")
-    print()
-    while winner is None:
-
-        # get current player's move 
-        if current_player == "user":
-            time.sleep(1)
-            move = get_player_move(last_played_combo, hand_1)
-        elif current_player == "landlord":
-            move = get_computer_move(last_played_combo, hand_3)
-        else: # current_player == peasant
-            move = get_computer_move(last_played_combo, hand_2)
-
-        if move == "pass": # player chose to pass
-            passes_in_a_row += 1
-            time.sleep(1)
-            print(f"{current_player.title()} passes")
-        
-            if passes_in_a_row == 2: # check the case where we end the round and start a new round
-                current_player_index = turn_order.index(current_player) 
-                updated_current_player_index = (current_player_index + 1) % len(turn_order)
-                current_player = turn_order[updated_current_player_index] # update current player to person who won the round (next player)
-                last_played_combo = None 
-                passes_in_a_row = 0
-                time.sleep(1)
-                print("End of round. Starting new round.")
-                print()
-            else: # only one pass so far, move to next person
-                current_player_index = turn_order.index(current_player) 
-                updated_current_player_index = (current_player_index + 1) % len(turn_order)
-                current_player = turn_order[updated_current_player_index] # update current player to next player
-
-        else: # player chose to play a combo
-            if current_player == "user":
-                remove_combo_from_hand(move, hand_1)
-            elif current_player == "landlord":
-                remove_combo_from_hand(move, hand_3)
-            else: # current_player = peasant
-                remove_combo_from_hand(move, hand_2)
-            
-            last_played_combo = move # update the last played combo
-            passes_in_a_row = 0 # reset number of passes in a row
-
-            if current_player == "user":
-                print(f"{current_player.title()} plays: {last_played_combo} ({get_combo_type(last_played_combo)}) [cards left: {len(hand_1)}]")
-            elif current_player == "landlord":
-                time.sleep(1)
-                print(f"{current_player.title()} plays: {last_played_combo} ({get_combo_type(last_played_combo)}) [cards left: {len(hand_3)}]")
-            else: # current_player == "peasant":
-                time.sleep(1)
-                print(f"{current_player.title()} plays: {last_played_combo} ({get_combo_type(last_played_combo)}) [cards left: {len(hand_2)}]")
-
-            # check win condition
-            if current_player == "user":
-                if len(hand_1) == 0:
-                    winner = current_player
-            elif current_player == "landlord":
-                if len(hand_3) == 0:
-                    winner = current_player            
-            else: # current_player = peasant
-                if len(hand_2) == 0:
-                    winner = current_player    
-            
-            if winner is None: # nobody has won yet, so move to next player
-                current_player_index = turn_order.index(current_player) 
-                updated_current_player_index = (current_player_index + 1) % len(turn_order)
-                current_player = turn_order[updated_current_player_index] # update current player to next player
-
-    time.sleep(1)
-    print()
-    print("Game is over")
-    print(f"Winner: {winner.title()}")
-    if winner == "landlord":
-        print("Landlord wins")
-    else: # winner == "user" or winner == "peasant"
-        print("Peasants win")
\ No newline at end of file
+    event_bus = EventBus(ConsoleRenderer(pacing=1, unpaced_seats=("user",)))
+    # the game keeps every hand sorted (see Hand), which makes the user's hand easier to read
+    play_game((hand_3, hand_1, hand_2), (get_computer_move, get_paced_player_move, get_computer_move), 
+              seats=turn_order, event_bus=event_bus)
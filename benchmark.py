@@ -0,0 +1,186 @@
+"""
+Small benchmarks for Beat the Landlord.
+
+    python benchmark.py startup     cold-start and warm-start times of the precomputed tables
+    python benchmark.py movegen     move generation and full games, for any variant (--rules)
+    python benchmark.py metrics     overhead of collecting live metrics while playing games
+"""
+
+
+import argparse # for the command line interface
+import functools # for binding rules to move functions
+import json # for reading timings back from child processes
+import os # for passing the tables directory to child processes
+import subprocess # for timing fresh interpreters
+import sys # for the current interpreter
+import tempfile # for a throwaway tables directory
+import random # for seeded deals
+import time # for timing
+
+import beat_the_landlord
+import metrics
+
+# run in a fresh interpreter, so nothing is already imported or loaded
+_STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import beat_the_landlord
+imported = time.perf_counter()
+beat_the_landlord.get_combo_type(["3", "3", "3", "4"])
+first_lookup = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_lookup": first_lookup - imported}))
+"""
+
+def time_startup(tables_directory):
+    """
+    Takes a tables directory as an argument and returns the import time and the time of the first
+    combo lookup (which loads or builds the combo table) in a fresh interpreter, in seconds
+    """
+    environment = dict(os.environ, BEAT_THE_LANDLORD_TABLES=tables_directory)
+    output = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT], env=environment, check=True,
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return json.loads(output)
+
+def startup_benchmark(repeats=5):
+    """
+    Takes a number of repeats as an argument and returns the best cold-start timings (tables built from
+    scratch) and warm-start timings (tables memory-mapped from disk)
+    """
+    cold = []
+    warm = []
+    for i in range(repeats):
+        with tempfile.TemporaryDirectory() as tables_directory:
+            cold.append(time_startup(tables_directory)) # first run builds and saves the tables
+            warm.append(time_startup(tables_directory)) # second run reuses them
+    best_cold = min(cold, key=lambda timing: timing["import"] + timing["first_lookup"])
+    best_warm = min(warm, key=lambda timing: timing["import"] + timing["first_lookup"])
+    return {"cold": best_cold, "warm": best_warm}
+
+def deal_benchmark_hands(rules, deals, seed=0):
+    """
+    Takes rules, a number of deals and a seed as arguments and returns the dealt hands of every deal
+    in turn order, with the landlord (first hand) holding the leftovers pile
+    """
+    rng = random.Random(seed)
+    deals_hands = []
+    for i in range(deals):
+        *hands, leftovers = beat_the_landlord.deal_hands_with_leftovers(beat_the_landlord.generate_shuffled_deck(rng, rules), rules)
+        hands[0].extend(leftovers)
+        deals_hands.append(hands)
+    return deals_hands
+
+def movegen_benchmark(rules, deals=200, seed=0):
+    """
+    Takes rules, a number of deals and a seed as arguments and returns timings (in seconds) for generating every
+    combo type from every dealt hand, for the computer's move on a new round and in response to each combo type,
+    and for playing whole computer-only games
+    """
+    beat_the_landlord.get_combo_type(["3"], rules) # load the combo table before timing anything
+    deals_hands = deal_benchmark_hands(rules, deals, seed)
+    hands = [hand for hands in deals_hands for hand in hands]
+    start = time.perf_counter()
+    combos_found = 0
+    for hand in hands:
+        for combo_type in beat_the_landlord.DEFINED_COMBOS:
+            combos_found += len(beat_the_landlord.get_combos(hand, combo_type, rules))
+    generation = time.perf_counter() - start
+    played_combos = [] # the lowest combo of every type that some hand can make, to respond to
+    for combo_type in beat_the_landlord.DEFINED_COMBOS:
+        for hand in hands:
+            for combo in beat_the_landlord.iter_combos(hand, combo_type, rules):
+                played_combos.append(combo)
+                break
+            else:
+                continue
+            break
+    start = time.perf_counter()
+    for hand in hands:
+        beat_the_landlord.get_computer_move(None, hand, rules)
+        for played_combo in played_combos:
+            beat_the_landlord.get_computer_move(played_combo, hand, rules)
+    decisions = len(hands) * (1 + len(played_combos))
+    decision_time = time.perf_counter() - start
+    move_function = functools.partial(beat_the_landlord.get_computer_move, rules=rules)
+    start = time.perf_counter()
+    for hands_of_deal in deals_hands:
+        beat_the_landlord.play_game(hands_of_deal, [move_function] * rules["seats"], rules)
+    games_time = time.perf_counter() - start
+    return {"hands": len(hands),
+            "average_hand_size": sum(len(hand) for hand in hands) / len(hands),
+            "combos_found": combos_found,
+            "generation": generation,
+            "decisions": decisions,
+            "decision_time": decision_time,
+            "games": deals,
+            "games_time": games_time}
+
+def metrics_benchmark(deals=200, repeats=5, sample_every=100, seed=0):
+    """
+    Takes a number of deals, a number of repeats, how often metrics sample a decision and a seed as arguments
+    and plays computer-only games on the deals without metrics and with instrumented metrics once per repeat,
+    swapping which goes first every repeat so that drifts in machine speed hit both alike. Returns the best CPU
+    time (in seconds) of each and the overhead: the median over the repeats of instrumented time / plain time - 1,
+    which shared machines skew much less than comparing the best times.
+    """
+    beat_the_landlord.get_combo_type(["3"]) # load the combo table before timing anything
+    deals_hands = deal_benchmark_hands(beat_the_landlord.STANDARD_RULES, deals, seed)
+    plain_times = []
+    instrumented_times = []
+    for i in range(repeats):
+        for instrumented in ((False, True) if i % 2 == 0 else (True, False)):
+            registry = metrics.MetricsRegistry()
+            if instrumented:
+                metrics.instrument(registry, sample_every)
+            try:
+                move_function = beat_the_landlord.get_computer_move # the wrapped one when instrumented
+                start = time.process_time() # CPU time, so other processes on the machine count less
+                for hands in deals_hands:
+                    result = beat_the_landlord.play_game(hands, [move_function] * 3)
+                    if instrumented:
+                        registry.inc("btl_games_total")
+                        registry.inc("btl_moves_total", result["moves"])
+                elapsed = time.process_time() - start
+            finally:
+                if instrumented:
+                    metrics.uninstrument()
+            if instrumented:
+                instrumented_times.append(elapsed)
+            else:
+                plain_times.append(elapsed)
+    ratios = sorted(instrumented_time / plain_time for plain_time, instrumented_time in zip(plain_times, instrumented_times))
+    return {"plain": min(plain_times),
+            "instrumented": min(instrumented_times),
+            "overhead": ratios[len(ratios) // 2] - 1}
+
+def main(argv=None):
+    """
+    Command line interface for running the benchmarks
+    """
+    parser = argparse.ArgumentParser(description="Beat the Landlord benchmarks.")
+    parser.add_argument("benchmark", choices=["startup", "movegen", "metrics"], help="benchmark to run")
+    parser.add_argument("--repeats", type=int, default=5, help="number of repeats (best is reported)")
+    parser.add_argument("--rules", choices=sorted(beat_the_landlord.RULES), default="standard", help="game variant")
+    parser.add_argument("--deals", type=int, default=200, help="number of deals to benchmark")
+    parser.add_argument("--sample-every", type=int, default=100, help="metrics time one decision in this many")
+    args = parser.parse_args(argv)
+    if args.benchmark == "metrics":
+        timings = metrics_benchmark(args.deals, args.repeats, args.sample_every)
+        print(f"Games without metrics: {timings['plain']:.3f} s, with metrics: {timings['instrumented']:.3f} s")
+        print(f"Metrics overhead (median of {args.repeats} paired runs): {timings['overhead'] * 100:.2f}%")
+    if args.benchmark == "movegen":
+        timings = movegen_benchmark(beat_the_landlord.RULES[args.rules], args.deals)
+        print(f"Rules: {args.rules}, {timings['hands']} hands averaging {timings['average_hand_size']:.1f} cards")
+        print(f"Generating every combo type: {timings['generation'] / timings['hands'] * 1e6:.0f} us per hand "
+              f"({timings['combos_found']} combos)")
+        print(f"Computer move: {timings['decision_time'] / timings['decisions'] * 1e6:.0f} us per decision")
+        print(f"Computer-only games: {timings['games'] / timings['games_time']:.1f} games/sec")
+    if args.benchmark == "startup":
+        timings = startup_benchmark(args.repeats)
+        for name in ("cold", "warm"):
+            timing = timings[name]
+            print(f"{name.title()} start: import {timing['import'] * 1000:.1f} ms, "
+                  f"first combo lookup {timing['first_lookup'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
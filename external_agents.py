@@ -0,0 +1,366 @@
+"""
+Runs third-party computer players as long-lived subprocesses, so they can be benchmarked against
+get_computer_move without importing their code.
+
+Agents talk to the engine over stdin/stdout, one JSON object per line. The engine sends:
+
+    {"type": "deal", "seat": "peasant 1", "seats": ["landlord", "peasant 1", "peasant 2"], "hand": ["3", ...]}
+    {"type": "observation", "seat": "landlord", "move": ["3", "3"] or "pass", "cards_left": [18, 17, 17]}
+    {"type": "request_move", "played_combo": ["3", "3"] or null, "hand": ["4", ...]}
+    {"type": "result", "winner": "landlord", "winning_side": "landlord"}
+
+and the agent answers every request_move (and nothing else) with:
+
+    {"type": "move", "move": ["4", "4"] or "pass"}
+
+An agent that doesn't answer within the move timeout, exits, or answers with an illegal move forfeits
+the game for its side, and its process is replaced before it is used again. stub_agent.py is a
+reference agent that plays like get_computer_move.
+"""
+
+
+import argparse # for the command line interface
+import json # for the line-based protocol
+import queue # for reading agent output with a timeout
+import shlex # for splitting agent commands
+import subprocess # for running agents
+import threading # for reading agent output in the background
+import time # for move latency
+from concurrent.futures import ThreadPoolExecutor # for playing several games at once
+
+from beat_the_landlord import SEATS, get_computer_move, get_game_result, new_game_state, step_game
+from tournament import deal_seeded_hands, format_summary, summarize_duplicate_results
+
+class AgentError(Exception):
+    """
+    Raised when an external agent exits, sends something that isn't a valid move message, or times out
+    """
+
+class AgentTimeoutError(AgentError):
+    """
+    Raised when an external agent doesn't answer a move request within the move timeout
+    """
+
+class ExternalAgent:
+    """
+    One agent subprocess speaking the line-based JSON protocol. Its output is read by a background
+    thread so move requests can time out instead of blocking forever.
+    """
+
+    def __init__(self, command):
+        self.command = list(command)
+        self.process = None
+        self.lines = None
+        self.start()
+
+    def start(self):
+        """
+        Starts (or restarts) the agent process
+        """
+        self.stop()
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, bufsize=1)
+        self.lines = queue.Queue()
+        reader = threading.Thread(target=self._read_lines, args=(self.process.stdout, self.lines), daemon=True)
+        reader.start()
+
+    @staticmethod
+    def _read_lines(stdout, lines):
+        """
+        Takes the agent's stdout and a queue as arguments and puts every line on the queue,
+        followed by None when the agent closes its output
+        """
+        for line in stdout:
+            lines.put(line)
+        lines.put(None)
+
+    def stop(self):
+        """
+        Stops the agent process if it is running
+        """
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def send(self, message):
+        """
+        Takes a JSON-compatible message as an argument and sends it to the agent as one line
+        """
+        try:
+            self.process.stdin.write(json.dumps(message, separators=(",", ":")) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as error:
+            raise AgentError(f"agent {self.command} closed its input") from error
+
+    def request_move(self, played_combo, hand, timeout):
+        """
+        Takes a played combo, a hand and a timeout in seconds as arguments, asks the agent for its move and
+        returns it as a combo or "pass". Raises AgentTimeoutError or AgentError if no valid answer arrives in time.
+        """
+        self.send({"type": "request_move", "played_combo": played_combo, "hand": hand})
+        try:
+            line = self.lines.get(timeout=timeout)
+        except queue.Empty:
+            raise AgentTimeoutError(f"agent {self.command} did not move within {timeout} seconds") from None
+        if line is None:
+            raise AgentError(f"agent {self.command} exited")
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError as error:
+            raise AgentError(f"agent {self.command} sent invalid JSON: {line!r}") from error
+        if not isinstance(message, dict) or message.get("type") != "move":
+            raise AgentError(f"agent {self.command} sent an unexpected message: {line!r}")
+        move = message.get("move")
+        if move != "pass" and not (isinstance(move, list) and all(isinstance(card, str) for card in move)):
+            raise AgentError(f"agent {self.command} sent an invalid move: {move!r}")
+        return move
+
+class AgentPool:
+    """
+    A fixed set of long-lived processes running the same agent command, reused across games.
+    Also records the move latency of every answered move request.
+    """
+
+    def __init__(self, command, size):
+        self.command = list(command)
+        self.idle = queue.Queue()
+        self.agents = []
+        for i in range(size):
+            agent = ExternalAgent(self.command)
+            self.agents.append(agent)
+            self.idle.put(agent)
+        self.latencies = [] # seconds taken by each answered move request
+        self.timeouts = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Returns an idle agent, waiting for one to be released if they are all in use
+        """
+        return self.idle.get()
+
+    def release(self, agent, failed=False):
+        """
+        Takes an agent from acquire and whether it failed during the game as arguments and returns it to the pool,
+        restarting a failed agent's process first since it may be out of step with the protocol
+        """
+        if failed:
+            agent.start()
+        self.idle.put(agent)
+
+    def record(self, latency=None, error=None):
+        """
+        Takes the latency of an answered move request, or the error raised instead, as an argument and records it
+        """
+        with self._lock:
+            if isinstance(error, AgentTimeoutError):
+                self.timeouts += 1
+            elif error is not None:
+                self.errors += 1
+            else:
+                self.latencies.append(latency)
+
+    def latency_report(self):
+        """
+        Returns a dictionary summarizing this pool's move latencies (in seconds), timeouts and errors
+        """
+        with self._lock:
+            latencies = sorted(self.latencies)
+            report = {"moves": len(latencies), "timeouts": self.timeouts, "errors": self.errors}
+        if latencies:
+            report["mean"] = sum(latencies) / len(latencies)
+            report["p50"] = latencies[len(latencies) // 2]
+            report["p95"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            report["max"] = latencies[-1]
+        return report
+
+    def close(self):
+        """
+        Stops every agent process in the pool
+        """
+        for agent in self.agents:
+            agent.stop()
+
+def play_external_game(hands, players, move_timeout):
+    """
+    Takes hands in turn order, a player per seat and a move timeout in seconds as arguments and plays a game.
+    Each player is either an in-process move function like get_computer_move or an (ExternalAgent, AgentPool)
+    pair. Returns the result dictionary from get_game_result plus "forfeit": the seat whose agent failed
+    (its side loses and "winner" is None), or None if the game was played out, and "failed_seats": the seats
+    whose agents failed and need restarting (the forfeit and any agent that exited before hearing the result).
+    """
+    state = new_game_state(hands)
+    external_seats = []
+    for seat, player in zip(SEATS, players):
+        if isinstance(player, tuple):
+            external_seats.append(seat)
+    current_failure = {}
+
+    def external_move_function(seat, agent, pool):
+        def move_function(played_combo, hand):
+            start = time.perf_counter()
+            try:
+                move = agent.request_move(played_combo, hand, move_timeout)
+            except AgentError as error:
+                pool.record(error=error)
+                current_failure["seat"] = seat
+                raise
+            pool.record(latency=time.perf_counter() - start)
+            return move
+        return move_function
+
+    move_functions = []
+    for seat, player in zip(SEATS, players):
+        if isinstance(player, tuple):
+            agent, pool = player
+            move_functions.append(external_move_function(seat, agent, pool))
+        else:
+            move_functions.append(player)
+    forfeit = None
+    try:
+        for seat, player, hand in zip(SEATS, players, state["hands"]):
+            if isinstance(player, tuple):
+                current_failure["seat"] = seat
+                player[0].send({"type": "deal", "seat": seat, "seats": list(SEATS), "hand": hand})
+        current_failure.clear()
+        while state["winner"] is None:
+            seat = SEATS[state["current_index"]]
+            try:
+                move = step_game(state, move_functions)
+            except ValueError: # illegal move
+                if seat not in external_seats:
+                    raise
+                error = AgentError(f"{seat} made an illegal move")
+                players[state["current_index"]][1].record(error=error)
+                current_failure["seat"] = seat
+                raise error from None
+            observation = {"type": "observation", "seat": seat, "move": move,
+                           "cards_left": [len(hand) for hand in state["hands"]]}
+            for observer, player in zip(SEATS, players):
+                if isinstance(player, tuple):
+                    current_failure["seat"] = observer # an agent can exit between its own moves
+                    player[0].send(observation)
+            current_failure.clear()
+    except AgentError:
+        forfeit = current_failure["seat"]
+    if forfeit is None:
+        result = get_game_result(state)
+    else:
+        result = {"winner": None,
+                  "winning_side": "peasants" if forfeit == "landlord" else "landlord",
+                  "moves": state["moves"],
+                  "bombs": state["bombs"],
+                  "combo_counts": dict(state["combo_counts"]),
+                  "cards_left": [len(hand) for hand in state["hands"]]}
+    result["forfeit"] = forfeit
+    result["failed_seats"] = [] if forfeit is None else [forfeit]
+    for seat, player in zip(SEATS, players):
+        if isinstance(player, tuple) and seat != forfeit:
+            try:
+                player[0].send({"type": "result", "winner": result["winner"], "winning_side": result["winning_side"]})
+            except AgentError: # too late to forfeit, but the agent still has to be restarted
+                result["failed_seats"].append(seat)
+    return result
+
+def _acquire_players(side_players, seats_needed):
+    """
+    Takes a side's player (a move function or an AgentPool) and the number of seats it fills as arguments
+    and returns that many players for play_external_game
+    """
+    if isinstance(side_players, AgentPool):
+        return [(side_players.acquire(), side_players) for i in range(seats_needed)]
+    return [side_players] * seats_needed
+
+def _release_players(players, result):
+    """
+    Takes the players of a finished game and its result as arguments and returns external agents to their pools
+    """
+    for seat, player in zip(SEATS, players):
+        if isinstance(player, tuple):
+            agent, pool = player
+            pool.release(agent, failed=(seat in result["failed_seats"]))
+
+def play_external_duplicate_deal(seed, player_a, player_b, move_timeout):
+    """
+    Takes a seed, two players (each a move function or an AgentPool) and a move timeout as arguments and plays
+    the seeded deal twice with the players swapping sides, like tournament.play_duplicate_deal
+    """
+    hands = deal_seeded_hands(seed)
+    results = []
+    for landlord_player, peasants_player in ((player_a, player_b), (player_b, player_a)):
+        # acquire the landlord and peasant agents separately so the two sides never wait on each other's pool
+        players = _acquire_players(landlord_player, 1) + _acquire_players(peasants_player, len(SEATS) - 1)
+        result = None
+        try:
+            result = play_external_game(hands, players, move_timeout)
+        finally:
+            _release_players(players, result if result is not None else {"failed_seats": []})
+        results.append(result)
+    a_landlord_win = results[0]["winning_side"] == "landlord"
+    a_peasants_win = results[1]["winning_side"] == "peasants"
+    return {"seed": seed,
+            "a_landlord_win": a_landlord_win,
+            "a_peasants_win": a_peasants_win,
+            "score": (int(a_landlord_win) + int(a_peasants_win)) / 2,
+            "results": tuple(results)}
+
+def run_external_match(player_a, player_b, deals, first_seed=0, move_timeout=1.0, concurrent_games=1):
+    """
+    Takes two players (each a move function or an AgentPool), a number of deals, a first seed, a move timeout
+    in seconds and a number of games to play at once as arguments and plays every deal in duplicate.
+    Pools need at least len(SEATS) - 1 agents per concurrent game. Returns the duplicate summary with the
+    number of forfeits added.
+    """
+    def play(seed):
+        return play_external_duplicate_deal(seed, player_a, player_b, move_timeout)
+
+    with ThreadPoolExecutor(max_workers=concurrent_games) as executor:
+        deal_results = list(executor.map(play, range(first_seed, first_seed + deals)))
+    summary = summarize_duplicate_results(deal_results)
+    summary["forfeits"] = sum(1 for deal_result in deal_results for result in deal_result["results"]
+                              if result["forfeit"] is not None)
+    return summary
+
+def format_latency_report(name, report):
+    """
+    Takes an agent name and a report from AgentPool.latency_report as arguments and returns it as printable text
+    """
+    text = f"{name}: {report['moves']} moves, {report['timeouts']} timeouts, {report['errors']} errors"
+    if report["moves"]:
+        text += (f", latency mean {report['mean'] * 1000:.2f} ms, p50 {report['p50'] * 1000:.2f} ms, "
+                 f"p95 {report['p95'] * 1000:.2f} ms, max {report['max'] * 1000:.2f} ms")
+    return text
+
+def main(argv=None):
+    """
+    Command line interface for a duplicate match between an external agent and get_computer_move
+    (or a second external agent)
+    """
+    parser = argparse.ArgumentParser(description="Benchmark external Beat the Landlord agents over stdin/stdout.")
+    parser.add_argument("--agent-a-command", required=True, help='command running agent A, e.g. "python stub_agent.py"')
+    parser.add_argument("--agent-b-command", help="command running agent B (default: get_computer_move in-process)")
+    parser.add_argument("--deals", type=int, default=100, help="number of seeded deals to play")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first deal")
+    parser.add_argument("--move-timeout", type=float, default=1.0, help="seconds an agent may take per move")
+    parser.add_argument("--concurrent-games", type=int, default=1, help="number of games to play at once")
+    args = parser.parse_args(argv)
+    pool_size = (len(SEATS) - 1) * args.concurrent_games
+    pools = {"Agent A": AgentPool(shlex.split(args.agent_a_command), pool_size)}
+    if args.agent_b_command is not None:
+        pools["Agent B"] = AgentPool(shlex.split(args.agent_b_command), pool_size)
+    try:
+        summary = run_external_match(pools["Agent A"], pools.get("Agent B", get_computer_move), args.deals,
+                                     args.first_seed, args.move_timeout, args.concurrent_games)
+    finally:
+        for pool in pools.values():
+            pool.close()
+    print(format_summary(summary))
+    print(f"Forfeits: {summary['forfeits']}")
+    for name, pool in pools.items():
+        print(format_latency_report(name, pool.latency_report()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Opt-in live metrics for long simulations and game servers, served in the Prometheus text format
+over local HTTP ("127.0.0.1:9100") or a Unix socket ("unix:/tmp/beat_the_landlord.sock").
+
+Nothing here runs unless it is switched on. instrument() replaces get_computer_move in beat_the_landlord
+with a wrapper that counts every decision and times one decision in every sample_every. While a decision is
+sampled, beat_the_landlord._metrics_sampler holds a sampler that get_computer_move hands the combo generators
+(timed as get_combos) and is_playable calls to, and that the combo table lookups count themselves on.
+Only one decision is sampled at a time and the sampler ignores other threads, so their calls are never timed,
+while decisions that aren't sampled only pay for a counter and a check for None. Latency histograms and combo
+table hit rates are therefore estimates from the sampled decisions.
+
+    curl http://127.0.0.1:9100/metrics
+    curl --unix-socket /tmp/beat_the_landlord.sock http://localhost/metrics
+"""
+
+
+import itertools # for counting decisions without a lock
+import os # for removing Unix sockets
+import socketserver # for serving over a Unix socket
+import threading # for serving in the background and locking the registry
+import time # for timing
+from bisect import bisect_left # for finding histogram buckets
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer # for serving scrapes
+
+import beat_the_landlord
+
+# upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.00001, 0.00003, 0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1.0)
+
+# every metric that can be reported: name -> (type, help text)
+METRICS = {"btl_games_total": ("counter", "Games finished."),
+           "btl_moves_total": ("counter", "Moves (plays and passes) made in finished games."),
+           "btl_games_per_second": ("gauge", "Games finished per second since the metrics started."),
+           "btl_moves_per_second": ("gauge", "Moves made per second since the metrics started."),
+           "btl_decisions_total": ("counter", "Calls to get_computer_move."),
+           "btl_function_seconds": ("histogram", "Latency of sampled calls, by function."),
+           "btl_combo_table_lookups_total": ("counter", "Combo lookups during sampled decisions."),
+           "btl_combo_table_misses_total": ("counter", "Sampled combo lookups that fell back to the is_* checks."),
+           "btl_combo_table_hit_ratio": ("gauge", "Share of sampled combo lookups answered by the combo table."),
+           "btl_workers": ("gauge", "Worker processes."),
+           "btl_worker_busy_seconds_total": ("counter", "Time worker processes spent playing games."),
+           "btl_worker_utilization": ("gauge", "Share of the workers' time spent playing games since the metrics started."),
+           "btl_tasks_in_flight": ("gauge", "Tasks handed to workers and not yet finished."),
+           "btl_queue_depth": ("gauge", "Tasks waiting for a free worker.")}
+
+_original_get_computer_move = None # the get_computer_move replaced by instrument(), if any
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters, gauges and histograms (see METRICS), each with optional labels.
+    Registries from worker processes can be shipped back with to_dict and added in with merge.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {} # (name, labels) -> number, or [bucket counts..., sum, count] for histograms
+        self.collectors = [] # functions run before every render, to update gauges
+        self.start_time = time.monotonic()
+
+    def inc(self, name, amount=1, labels=()):
+        """
+        Takes a counter name, an amount and labels (a tuple of (label, value) pairs) as arguments and adds the amount
+        """
+        key = (name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, name, value, labels=()):
+        """
+        Takes a gauge name, a value and labels as arguments and sets the gauge
+        """
+        with self.lock:
+            self.values[(name, labels)] = value
+
+    def observe(self, name, value, labels=()):
+        """
+        Takes a histogram name, an observed value (in seconds) and labels as arguments and adds the observation
+        """
+        key = (name, labels)
+        with self.lock:
+            histogram = self.values.get(key)
+            if histogram is None:
+                histogram = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+                self.values[key] = histogram
+            index = bisect_left(LATENCY_BUCKETS, value) # the first bucket the value fits in
+            if index < len(LATENCY_BUCKETS): # buckets are cumulative when rendered, so only count the first that fits
+                histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def get(self, name, labels=()):
+        """
+        Takes a counter or gauge name and labels as arguments and returns its value (0 if it was never set)
+        """
+        with self.lock:
+            return self.values.get((name, labels), 0)
+
+    def add_collector(self, collector):
+        """
+        Takes a function of no arguments as an argument and runs it before every render, so it can update gauges
+        """
+        self.collectors.append(collector)
+
+    def collect(self):
+        """
+        Runs the collectors, so counters kept outside the registry are brought up to date
+        """
+        for collector in self.collectors:
+            collector()
+
+    def to_dict(self):
+        """
+        Returns the counters and histograms as a picklable list of [name, labels, value] entries.
+        Gauges are left out, since they describe the process that set them.
+        """
+        self.collect()
+        entries = []
+        with self.lock:
+            for (name, labels), value in self.values.items():
+                if METRICS[name][0] == "gauge":
+                    continue
+                if isinstance(value, list):
+                    value = list(value)
+                entries.append([name, labels, value])
+        return entries
+
+    def merge(self, entries):
+        """
+        Takes entries from another registry's to_dict as an argument and adds its counters and histograms into this one
+        """
+        with self.lock:
+            for name, labels, value in entries:
+                key = (name, tuple(labels))
+                if isinstance(value, list):
+                    histogram = self.values.get(key)
+                    if histogram is None:
+                        self.values[key] = list(value)
+                    else:
+                        for index in range(len(value)):
+                            histogram[index] += value[index]
+                else:
+                    self.values[key] = self.values.get(key, 0) + value
+
+    def render(self):
+        """
+        Runs the collectors and returns every metric in the Prometheus text format
+        """
+        self.collect()
+        elapsed = max(time.monotonic() - self.start_time, 1e-9)
+        self.set("btl_games_per_second", self.get("btl_games_total") / elapsed)
+        self.set("btl_moves_per_second", self.get("btl_moves_total") / elapsed)
+        lookups = self.get("btl_combo_table_lookups_total")
+        if lookups > 0:
+            self.set("btl_combo_table_hit_ratio", 1 - self.get("btl_combo_table_misses_total") / lookups)
+        with self.lock:
+            values = dict(self.values)
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            keys = sorted(key for key in values if key[0] == name)
+            if len(keys) == 0:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for key in keys:
+                labels = key[1]
+                value = values[key]
+                if metric_type == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS, value):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {value[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {value[-2]!r}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {value!r}")
+        return "\n".join(lines) + "\n"
+
+def _format_labels(labels):
+    """
+    Takes labels (a tuple of (label, value) pairs) as an argument and returns them in the Prometheus text format
+    """
+    if len(labels) == 0:
+        return ""
+    return "{" + ",".join(f'{label}="{value}"' for label, value in labels) + "}"
+
+class _DecisionSampler:
+    """
+    Times and counts the work of one sampled decision. Calls from threads other than the one making the decision
+    are ignored, and the counters are added to the registry when the decision is finished.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.thread = threading.get_ident() # the thread making the sampled decision
+        self.lookups = 0 # combo lookups, counted by beat_the_landlord._lookup_combo
+        self.misses = 0 # lookups that fell back to the is_* checks
+
+    def for_current_thread(self):
+        """
+        Returns this sampler if the calling thread is making the sampled decision, otherwise None
+        """
+        if threading.get_ident() == self.thread:
+            return self
+        return None
+
+    def count_lookup(self):
+        """
+        Counts a combo table lookup made by the sampled decision
+        """
+        if threading.get_ident() == self.thread:
+            self.lookups += 1
+
+    def count_miss(self):
+        """
+        Counts a combo lookup of the sampled decision that fell back to the is_* checks
+        """
+        if threading.get_ident() == self.thread:
+            self.misses += 1
+
+    def time_combos(self, combos):
+        """
+        Takes an iterator of combos (from iter_combos) as an argument and yields its combos, recording the time spent
+        generating the ones that were asked for as one get_combos call once the iterator is finished or abandoned
+        """
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    combo = next(combos)
+                except StopIteration:
+                    elapsed += time.perf_counter() - start
+                    return
+                elapsed += time.perf_counter() - start
+                yield combo
+        finally:
+            self.registry.observe("btl_function_seconds", elapsed, (("function", "get_combos"),))
+
+    def time_is_playable(self, played_combo, playing_combo, rules=None):
+        """
+        Takes the arguments of is_playable, calls it and returns its answer, recording how long it took
+        """
+        start = time.perf_counter()
+        try:
+            return beat_the_landlord.is_playable(played_combo, playing_combo, rules)
+        finally:
+            self.registry.observe("btl_function_seconds", time.perf_counter() - start, (("function", "is_playable"),))
+
+    def finish(self):
+        """
+        Adds the decision's combo table lookups and misses to the registry
+        """
+        self.registry.inc("btl_combo_table_lookups_total", self.lookups)
+        self.registry.inc("btl_combo_table_misses_total", self.misses)
+
+def instrument(registry, sample_every=100):
+    """
+    Takes a registry and how often to sample (one decision in every sample_every) as arguments and replaces
+    get_computer_move in beat_the_landlord with a counting wrapper that samples decisions (see the module docstring).
+    Move functions looked up before this (e.g. "from beat_the_landlord import get_computer_move") are not affected.
+    """
+    global _original_get_computer_move
+    if _original_get_computer_move is not None:
+        uninstrument()
+    original_get_computer_move = beat_the_landlord.get_computer_move
+    # next() on a count is atomic, so threads can number their decisions without a lock. The collector takes
+    # numbers too, so decisions made = the last number taken - the numbers the collector took.
+    decision_numbers = itertools.count(1)
+    collector_lock = threading.Lock()
+    collector_numbers = [0, 0] # numbers taken by the collector, and decisions already added to the registry
+    def report_decisions():
+        with collector_lock:
+            collector_numbers[0] += 1
+            made_decisions = next(decision_numbers) - collector_numbers[0]
+            new_decisions = made_decisions - collector_numbers[1]
+            collector_numbers[1] = made_decisions
+        registry.inc("btl_decisions_total", new_decisions)
+    registry.add_collector(report_decisions)
+    sampling_lock = threading.Lock() # only taken by the decisions that are sampled
+    labels = (("function", "get_computer_move"),)
+    def sampled_get_computer_move(played_combo, hand, rules=None):
+        if next(decision_numbers) % sample_every != 0: # most decisions run untouched
+            return original_get_computer_move(played_combo, hand, rules)
+        sampler = _DecisionSampler(registry)
+        with sampling_lock:
+            if beat_the_landlord._metrics_sampler is not None: # another thread's decision is being sampled
+                sampler = None
+            else:
+                beat_the_landlord._metrics_sampler = sampler
+        if sampler is None:
+            return original_get_computer_move(played_combo, hand, rules)
+        start = time.perf_counter()
+        try:
+            return original_get_computer_move(played_combo, hand, rules)
+        finally:
+            registry.observe("btl_function_seconds", time.perf_counter() - start, labels)
+            beat_the_landlord._metrics_sampler = None
+            sampler.finish()
+    _original_get_computer_move = original_get_computer_move
+    beat_the_landlord.get_computer_move = sampled_get_computer_move
+
+def uninstrument():
+    """
+    Puts back the get_computer_move replaced by instrument()
+    """
+    global _original_get_computer_move
+    if _original_get_computer_move is not None:
+        beat_the_landlord.get_computer_move = _original_get_computer_move
+        _original_get_computer_move = None
+    beat_the_landlord._metrics_sampler = None
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET /metrics with the server's registry in the Prometheus text format
+    """
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        return str(self.client_address) # Unix socket clients have no host address
+
+    def log_message(self, format, *args):
+        pass # scrapes are frequent, so don't print every request
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    HTTP server listening on a Unix socket
+    """
+    daemon_threads = True
+
+def start_metrics_server(registry, address):
+    """
+    Takes a registry and an address ("HOST:PORT", or "unix:PATH" for a Unix socket) as arguments, starts serving
+    the registry's metrics in a background thread and returns the server (stop it with stop_metrics_server).
+    Port 0 picks a free port, which is then in server.server_address.
+    """
+    if address.startswith("unix:"):
+        server = _UnixHTTPServer(address[len("unix:"):], _MetricsHandler)
+    else:
+        host, separator, port = address.rpartition(":")
+        if separator == "":
+            raise ValueError(f"metrics address must be HOST:PORT or unix:PATH, got {address!r}")
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), _MetricsHandler)
+        server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def stop_metrics_server(server):
+    """
+    Takes a server from start_metrics_server as an argument, stops it and removes its Unix socket, if any
+    """
+    server.shutdown()
+    server.server_close()
+    if isinstance(server, _UnixHTTPServer):
+        try:
+            os.unlink(server.server_address)
+        except OSError: # already removed
+            pass
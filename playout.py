@@ -0,0 +1,238 @@
+"""
+Fast playouts (whole games played to the end) for sampling-based computer players.
+
+A playout uses the same first-fit policy as get_computer_move under the standard rules, so it finishes
+exactly like play_game with three get_computer_move players, but it never builds card lists or combo lists.
+Hands are packed into integers (four bits per rank, like the combo table keys) and moves come from move
+tables built once from the combo table:
+
+    - every combo is grouped by combo type and length, in the order iter_combos generates it, so the
+      first combo of a group contained in a hand is the one get_computer_move would find first
+    - for every group and rank, the position of the first combo that beats that rank is precomputed
+
+A hand contains a combo when subtracting the combo's packed counts from the hand borrows from no rank.
+With at most four cards of a rank, setting the high bit of every rank first (hand | HIGH_BITS) turns that
+into a single subtraction and mask for all fifteen ranks at once.
+
+    python playout.py --seconds 5     report playouts/sec on seeded deals
+"""
+
+
+import argparse # for the command line interface
+import random # for seeded deals
+import time # for timing
+
+from beat_the_landlord import (DEFINED_COMBOS, RANK_ORDER, STANDARD_RULES, _combo_key, deal_hands_with_leftovers,
+                               generate_shuffled_deck, get_combo_rank, get_combo_type, iter_combos)
+
+# the high bit of every rank's four bits, which no hand or combo of one deck ever sets
+HIGH_BITS = int("8" * len(RANK_ORDER), 16)
+
+_playout_tables = None # built the first time a playout needs them
+
+def hand_key(hand):
+    """
+    Takes a hand (a list of cards) as an argument and returns it packed into an integer, four bits per rank
+    """
+    key = _combo_key(hand)
+    if key is None or key & HIGH_BITS: # invalid card, or more than one deck's worth of a rank
+        raise ValueError("a playout hand must contain valid cards from a single deck")
+    return key
+
+def build_playout_tables():
+    """
+    Enumerates every combo of a full deck and returns the move tables as a dictionary:
+        "group_keys":    for each group, a tuple of the packed combos in generation order
+        "group_ranks":   for each group, a tuple of the combo ranks (in the same order)
+        "group_lengths": for each group, the number of cards in each of its combos
+        "first_above":   for each group, a tuple giving for every rank the position of the first combo ranked higher
+        "groups":        maps (combo type, length) to its group number
+        "bomb_group", "rocket_group", "single_group": the group numbers the playout policy needs directly
+        "lowest_single": for each bit length of the lowest set bit of a hand, (packed single, rank) of its lowest card
+    """
+    full_deck = generate_shuffled_deck(random.Random(0)) # every combo is contained in a full deck
+    groups = {}
+    group_keys = []
+    group_ranks = []
+    group_lengths = []
+    for combo_type in DEFINED_COMBOS:
+        for combo in iter_combos(full_deck, combo_type):
+            group_name = (combo_type, len(combo))
+            if group_name not in groups:
+                groups[group_name] = len(group_keys)
+                group_keys.append([])
+                group_ranks.append([])
+                group_lengths.append(len(combo))
+            group = groups[group_name]
+            group_keys[group].append(_combo_key(combo))
+            group_ranks[group].append(get_combo_rank(combo))
+    highest_rank = max(max(ranks) for ranks in group_ranks)
+    first_above = []
+    for ranks in group_ranks:
+        if ranks != sorted(ranks): # first-fit from a position only works if weaker combos come first
+            raise AssertionError("combos of one type and length must be generated from weakest to strongest")
+        positions = []
+        for rank in range(highest_rank + 1):
+            position = 0
+            while position < len(ranks) and ranks[position] <= rank:
+                position += 1
+            positions.append(position)
+        first_above.append(tuple(positions))
+    lowest_single = [None] # a hand with no cards has no lowest card
+    for bit in range(4 * len(RANK_ORDER)):
+        rank_index = bit // 4
+        single = [RANK_ORDER[rank_index]]
+        lowest_single.append((_combo_key(single), get_combo_rank(single)))
+    return {"group_keys": tuple(tuple(keys) for keys in group_keys),
+            "group_ranks": tuple(tuple(ranks) for ranks in group_ranks),
+            "group_lengths": tuple(group_lengths),
+            "first_above": tuple(first_above),
+            "groups": groups,
+            "bomb_group": groups[("bomb", 4)],
+            "rocket_group": groups[("rocket", 2)],
+            "single_group": groups[("single", 1)],
+            "lowest_single": tuple(lowest_single)}
+
+def get_playout_tables():
+    """
+    Returns the move tables of build_playout_tables, building them the first time they are needed
+    """
+    global _playout_tables
+    if _playout_tables is None:
+        _playout_tables = build_playout_tables()
+    return _playout_tables
+
+def load_hands(hands, hand_keys, cards_left):
+    """
+    Takes hands (lists of cards, in turn order) and two preallocated lists with one slot per seat as arguments
+    and fills them in place with the packed hands and their numbers of cards, so the same lists can be
+    reused for every playout
+    """
+    for seat_index in range(len(hands)):
+        hand_keys[seat_index] = hand_key(hands[seat_index])
+        cards_left[seat_index] = len(hands[seat_index])
+
+def playout(hand_keys, cards_left, current_index=0, played_combo=None, passes_in_a_row=0):
+    """
+    Takes packed hands and their numbers of cards (filled by load_hands, in turn order), the seat to move,
+    the combo to respond to (None on a new round) and the number of passes since it was played as arguments,
+    and plays the game to the end with the get_computer_move policy under the standard rules.
+    The hand_keys and cards_left lists are updated in place as cards are played.
+    Returns the index of the winning seat.
+    """
+    tables = get_playout_tables()
+    group_keys = tables["group_keys"]
+    group_ranks = tables["group_ranks"]
+    group_lengths = tables["group_lengths"]
+    first_above = tables["first_above"]
+    bomb_group = tables["bomb_group"]
+    rocket_group = tables["rocket_group"]
+    single_group = tables["single_group"]
+    lowest_single = tables["lowest_single"]
+    seats = len(hand_keys)
+    if played_combo is None: # a new round
+        last_group = -1
+        last_rank = 0
+    else: # find the group and rank of the combo to respond to once, up front
+        last_group = tables["groups"][(get_combo_type(played_combo), len(played_combo))]
+        last_rank = get_combo_rank(played_combo)
+    while True:
+        hand = hand_keys[current_index]
+        if last_group < 0: # new round: play the lowest single, like get_computer_move
+            move, last_rank = lowest_single[(hand & -hand).bit_length()]
+            hand_keys[current_index] = hand - move
+            cards_left[current_index] -= 1
+            last_group = single_group
+            passes_in_a_row = 0
+        else: # respond with the first combo of the same group that beats the played one, then bombs, then the rocket
+            high_hand = hand | HIGH_BITS
+            move = 0
+            keys = group_keys[last_group]
+            position = first_above[last_group][last_rank]
+            while position < len(keys): # same combo type and length, stronger rank
+                if (high_hand - keys[position]) & HIGH_BITS == HIGH_BITS: # no rank borrowed, so the hand contains it
+                    move = keys[position]
+                    last_rank = group_ranks[last_group][position]
+                    break
+                position += 1
+            if move == 0 and last_group != bomb_group and last_group != rocket_group: # any bomb beats other combos
+                keys = group_keys[bomb_group]
+                position = 0
+                while position < len(keys):
+                    if (high_hand - keys[position]) & HIGH_BITS == HIGH_BITS:
+                        move = keys[position]
+                        last_group = bomb_group
+                        last_rank = group_ranks[bomb_group][position]
+                        break
+                    position += 1
+            if move == 0 and last_group != rocket_group: # the rocket beats everything else
+                rocket = group_keys[rocket_group][0]
+                if (high_hand - rocket) & HIGH_BITS == HIGH_BITS:
+                    move = rocket
+                    last_group = rocket_group
+                    last_rank = group_ranks[rocket_group][0]
+            if move == 0: # nothing beats the played combo, so pass
+                passes_in_a_row += 1
+                if passes_in_a_row == seats - 1: # everyone else passed, so start a new round
+                    last_group = -1
+                    passes_in_a_row = 0
+                current_index = (current_index + 1) % seats
+                continue
+            hand_keys[current_index] = hand - move
+            cards_left[current_index] -= group_lengths[last_group]
+            passes_in_a_row = 0
+        if cards_left[current_index] == 0: # check win condition
+            return current_index
+        current_index = (current_index + 1) % seats
+
+def playout_benchmark(seconds=5.0, deals=1000, seed=0):
+    """
+    Takes a time budget in seconds, a number of seeded deals and a seed as arguments, plays playouts of the
+    deals over and over until the time is up and returns a dictionary with the number of playouts, the time
+    taken and the landlord's win rate
+    """
+    rng = random.Random(seed)
+    deals_hands = []
+    for i in range(deals): # deal up front so dealing isn't timed
+        hand_1, hand_2, hand_3, leftovers = deal_hands_with_leftovers(generate_shuffled_deck(rng, STANDARD_RULES), STANDARD_RULES)
+        deals_hands.append([hand_3 + leftovers, hand_1, hand_2])
+    packed_deals = []
+    for hands in deals_hands:
+        hand_keys = [0, 0, 0]
+        cards_left = [0, 0, 0]
+        load_hands(hands, hand_keys, cards_left)
+        packed_deals.append((tuple(hand_keys), tuple(cards_left)))
+    get_playout_tables() # build the move tables before timing anything
+    hand_keys = [0, 0, 0] # preallocated once and reused by every playout
+    cards_left = [0, 0, 0]
+    playouts = 0
+    landlord_wins = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for packed_hands, packed_cards_left in packed_deals:
+            hand_keys[0], hand_keys[1], hand_keys[2] = packed_hands
+            cards_left[0], cards_left[1], cards_left[2] = packed_cards_left
+            if playout(hand_keys, cards_left) == 0:
+                landlord_wins += 1
+        playouts += len(packed_deals)
+    elapsed = time.perf_counter() - start
+    return {"playouts": playouts, "seconds": elapsed, "landlord_win_rate": landlord_wins / playouts}
+
+def main(argv=None):
+    """
+    Command line interface for the playout benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark Beat the Landlord playouts.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="time to spend playing playouts")
+    parser.add_argument("--deals", type=int, default=1000, help="number of seeded deals to cycle through")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the deals")
+    args = parser.parse_args(argv)
+    result = playout_benchmark(args.seconds, args.deals, args.seed)
+    print(f"Playouts: {result['playouts']} in {result['seconds']:.2f} s")
+    print(f"Playouts/sec: {result['playouts'] / result['seconds']:.0f}")
+    print(f"Landlord win rate: {result['landlord_win_rate']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
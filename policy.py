@@ -0,0 +1,334 @@
+"""
+Lead and response policy tables built from self-play, and a computer player that uses them.
+
+Situations are abstracted so that similar positions share statistics:
+    - the player's role: landlord, the peasant after the landlord or the peasant before the landlord
+    - the shape of the hand: how many ranks are held as singles, pairs, triplets and quads (capped),
+      whether it holds the rocket and roughly how many cards are left
+    - roughly how many cards the closest-to-winning opponent has left
+    - the played combo's type and rough rank, and whether the other peasant played it (or a new round)
+Actions are abstracted too: on a new round, the combo type to lead (the lowest combo of that type is played);
+when responding, "beat" (the lowest combo of the same type and length that beats it), "bomb", "rocket" or "pass".
+
+The offline job plays seeded self-play games with get_computer_move, exploring a random action at some
+decisions, and credits every (situation, action) seen with the game's result for that player's side.
+Only situations where the best action's win rate beats get_computer_move's choice by a margin, with enough
+games behind both, are kept, most-played first and up to a maximum number of entries.
+
+At runtime get_policy_move looks its situation up in a dictionary and plays the table's action, and
+falls back to get_computer_move when there is no confident entry (or no table at all).
+
+    python policy.py --games 100000 --workers 4     build and save the table
+"""
+
+
+import argparse # for the command line interface
+import json # for the table file
+import multiprocessing # for self-play in worker processes
+import os # for the table path
+import random # for seeded exploration
+
+from beat_the_landlord import (DEFINED_COMBOS, STANDARD_RULES, TABLES_DIRECTORY, count_combos, get_combo_rank,
+                               get_combo_type, get_computer_move, get_game_rules, is_playable, iter_combos,
+                               new_game_state, step_game)
+from simulation import write_json_atomically
+from tournament import deal_seeded_hands
+
+# bumped whenever situations or actions are abstracted differently, so old tables are not misread
+POLICY_TABLE_VERSION = 1
+
+RESPONSE_ACTIONS = ("beat", "bomb", "rocket", "pass")
+
+_policy_table = None # loaded the first time get_policy_move needs it
+
+def _bucket(number, limits):
+    """
+    Takes a number and increasing limits as arguments and returns how many limits the number is above
+    """
+    bucket = 0
+    for limit in limits:
+        if number > limit:
+            bucket += 1
+    return bucket
+
+def get_situation(played_combo, hand, game_state):
+    """
+    Takes a played combo (None on a new round), a hand and the game state as arguments and returns the
+    abstracted situation as a string key (see the module docstring)
+    """
+    hand_dict = {}
+    for card in hand: # put hand into a dictionary representing frequency of each card
+        if card not in hand_dict:
+            hand_dict[card] = 1
+        else:
+            hand_dict[card] += 1
+    shape = [0, 0, 0, 0] # ranks held as singles, pairs, triplets and quads
+    for rank in hand_dict:
+        shape[hand_dict[rank] - 1] += 1
+    has_rocket = "B" in hand_dict and "R" in hand_dict
+    seat_index = game_state["current_index"]
+    cards_left = [len(other_hand) for other_hand in game_state["hands"]]
+    if seat_index == 0: # the landlord plays against both peasants
+        opponent_cards_left = min(cards_left[1:])
+    else: # peasants play against the landlord
+        opponent_cards_left = cards_left[0]
+    if played_combo is None:
+        played = "lead"
+    else:
+        played_by = (seat_index - game_state["passes_in_a_row"] - 1) % len(game_state["hands"]) # everyone since passed
+        if seat_index != 0 and played_by != 0: # the other peasant played it
+            played_by_side = "partner"
+        else:
+            played_by_side = "opponent"
+        played = f"{get_combo_type(played_combo)}/{_bucket(get_combo_rank(played_combo), (4, 9))}/{played_by_side}"
+    return ",".join([str(seat_index),
+                     str(min(shape[0], 6)), str(min(shape[1], 4)), str(min(shape[2], 3)), str(min(shape[3], 2)),
+                     str(int(has_rocket)),
+                     str(_bucket(len(hand), (2, 5, 10))),
+                     str(_bucket(opponent_cards_left, (1, 2, 5))),
+                     played])
+
+def get_action_move(action, played_combo, hand):
+    """
+    Takes an action, a played combo (None on a new round) and a hand as arguments and returns the move the
+    action stands for, or None if the hand can't make it
+    """
+    if action == "pass":
+        if played_combo is None: # can't pass on a new round
+            return None
+        return "pass"
+    if played_combo is None: # leading actions are combo types
+        for combo in iter_combos(hand, action): # the lowest combo of the type
+            return combo
+        return None
+    combo_type = get_combo_type(played_combo)
+    if action == "beat":
+        if combo_type == "bomb" or combo_type == "rocket": # bombs and the rocket are their own actions
+            return None
+        candidate_type = combo_type
+    else: # "bomb" or "rocket"
+        candidate_type = action
+    for candidate_combo in iter_combos(hand, candidate_type):
+        if candidate_type == combo_type and combo_type != "bomb" and len(candidate_combo) != len(played_combo):
+            continue # regular combos must match the played combo's length
+        if is_playable(played_combo, candidate_combo):
+            return candidate_combo
+    return None
+
+def get_available_actions(played_combo, hand):
+    """
+    Takes a played combo (None on a new round) and a hand as arguments and returns the actions the hand can make
+    """
+    if played_combo is None:
+        actions = []
+        for combo_type in DEFINED_COMBOS:
+            if count_combos(hand, combo_type) > 0:
+                actions.append(combo_type)
+        return actions
+    actions = []
+    for action in RESPONSE_ACTIONS:
+        if get_action_move(action, played_combo, hand) is not None:
+            actions.append(action)
+    return actions
+
+def get_default_action(played_combo, hand):
+    """
+    Takes a played combo (None on a new round) and a hand as arguments and returns the action get_computer_move takes
+    """
+    move = get_computer_move(played_combo, hand)
+    if move == "pass":
+        return "pass"
+    move_type = get_combo_type(move)
+    if played_combo is None:
+        return move_type
+    if move_type == "bomb" or move_type == "rocket": # bombs and the rocket are their own actions
+        return move_type
+    return "beat"
+
+def self_play(seeds, exploration=0.2, exploration_seed=0):
+    """
+    Takes seeds, the chance of exploring a random action at each decision and a seed for the exploration as arguments,
+    plays one self-play game per seeded deal and returns the statistics as a dictionary mapping each situation to
+    {"actions": {action: [wins, games]}, "defaults": {action: how often get_computer_move took it}}
+    """
+    rng = random.Random(exploration_seed)
+    statistics = {}
+    for seed in seeds:
+        decisions = [] # (seat index, situation, action, default action) of every decision in the game
+        def explore_move(played_combo, hand, game_state):
+            situation = get_situation(played_combo, hand, game_state)
+            default_action = get_default_action(played_combo, hand)
+            action = default_action
+            if rng.random() < exploration:
+                action = rng.choice(get_available_actions(played_combo, hand))
+            decisions.append((game_state["current_index"], situation, action, default_action))
+            return get_action_move(action, played_combo, hand)
+        explore_move.takes_game_state = True
+        state = new_game_state(deal_seeded_hands(seed))
+        while state["winner"] is None:
+            step_game(state, [explore_move] * len(state["hands"]))
+        landlord_won = state["winner"] == state["seats"][0]
+        for seat_index, situation, action, default_action in decisions:
+            won = landlord_won == (seat_index == 0) # the landlord plays alone against the peasants
+            if situation not in statistics:
+                statistics[situation] = {"actions": {}, "defaults": {}}
+            actions = statistics[situation]["actions"]
+            defaults = statistics[situation]["defaults"]
+            if action not in actions:
+                actions[action] = [0, 0]
+            actions[action][0] += int(won)
+            actions[action][1] += 1
+            defaults[default_action] = defaults.get(default_action, 0) + 1
+    return statistics
+
+def _self_play_task(task):
+    """
+    Takes a (seeds, exploration, exploration_seed) tuple as an argument and returns the statistics of self_play.
+    Used by worker processes.
+    """
+    seeds, exploration, exploration_seed = task
+    return self_play(seeds, exploration, exploration_seed)
+
+def merge_statistics(statistics, other):
+    """
+    Takes two self-play statistics dictionaries as arguments and adds the second into the first
+    """
+    for situation, other_situation in other.items():
+        if situation not in statistics:
+            statistics[situation] = {"actions": {}, "defaults": {}}
+        actions = statistics[situation]["actions"]
+        for action, (wins, games) in other_situation["actions"].items():
+            if action not in actions:
+                actions[action] = [0, 0]
+            actions[action][0] += wins
+            actions[action][1] += games
+        defaults = statistics[situation]["defaults"]
+        for action, count in other_situation["defaults"].items():
+            defaults[action] = defaults.get(action, 0) + count
+
+def build_policy_table(statistics, min_games=200, margin=0.05, max_entries=20000):
+    """
+    Takes self-play statistics, the fewest games an action needs, the win rate margin the best action needs
+    over get_computer_move's usual action and the maximum number of entries as arguments, and returns the
+    table entries as a dictionary mapping each situation to its best action and every action's [win rate, games]
+    """
+    candidates = []
+    for situation, situation_statistics in statistics.items():
+        actions = situation_statistics["actions"]
+        defaults = situation_statistics["defaults"]
+        default_action = max(sorted(defaults), key=lambda action: defaults[action]) # get_computer_move's usual action
+        if default_action not in actions or actions[default_action][1] < min_games:
+            continue
+        default_win_rate = actions[default_action][0] / actions[default_action][1]
+        best_action = default_action
+        best_win_rate = default_win_rate
+        for action in sorted(actions):
+            wins, games = actions[action]
+            if games >= min_games and wins / games > best_win_rate:
+                best_action = action
+                best_win_rate = wins / games
+        if best_action == default_action or best_win_rate - default_win_rate < margin:
+            continue # not confident that the table beats get_computer_move here
+        total_games = sum(games for wins, games in actions.values())
+        candidates.append((total_games, situation, best_action, actions))
+    candidates.sort(key=lambda candidate: (-candidate[0], candidate[1])) # most-played situations first
+    entries = {}
+    for total_games, situation, best_action, actions in candidates[:max_entries]:
+        win_rates = {}
+        for action in sorted(actions):
+            wins, games = actions[action]
+            win_rates[action] = [round(wins / games, 4), games]
+        entries[situation] = {"action": best_action, "win_rates": win_rates}
+    return entries
+
+def run_policy_build(games, first_seed=0, workers=1, chunk_size=1000, exploration=0.2, min_games=200, margin=0.05, max_entries=20000):
+    """
+    Takes a number of self-play games, the first seed, a number of worker processes, games per worker task, the
+    exploration chance and the table limits (see build_policy_table) as arguments and returns the policy table
+    """
+    tasks = []
+    for start in range(first_seed, first_seed + games, chunk_size):
+        tasks.append((range(start, min(start + chunk_size, first_seed + games)), exploration, start))
+    statistics = {}
+    if workers == 1:
+        for task in tasks:
+            merge_statistics(statistics, _self_play_task(task))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for result in pool.imap_unordered(_self_play_task, tasks):
+                merge_statistics(statistics, result)
+    return {"version": POLICY_TABLE_VERSION,
+            "rules": STANDARD_RULES["name"],
+            "games": games,
+            "entries": build_policy_table(statistics, min_games, margin, max_entries)}
+
+def policy_table_path():
+    """
+    Returns the path of the saved policy table
+    """
+    return os.path.join(TABLES_DIRECTORY, f"policy-v{POLICY_TABLE_VERSION}.json")
+
+def get_policy_table():
+    """
+    Returns the policy table entries, loading the saved table the first time they are needed
+    (an empty table if there is no saved table for the current version)
+    """
+    global _policy_table
+    if _policy_table is None:
+        try:
+            with open(policy_table_path()) as table_file:
+                table = json.load(table_file)
+        except (OSError, ValueError): # no table built yet
+            table = {}
+        if table.get("version") == POLICY_TABLE_VERSION and table.get("rules") == STANDARD_RULES["name"]:
+            _policy_table = table["entries"]
+        else:
+            _policy_table = {}
+    return _policy_table
+
+def get_policy_move(played_combo, hand, game_state=None):
+    """
+    Takes a played combo, a hand and the game state as arguments and returns the policy table's move for the
+    situation, or get_computer_move's move if the table has no confident entry for it (or there is no game state,
+    or the game doesn't use the standard rules). It does not modify the hand argument.
+    """
+    if game_state is None or get_game_rules(game_state) is not STANDARD_RULES:
+        return get_computer_move(played_combo, hand)
+    table = get_policy_table()
+    if len(table) == 0: # no table, so don't spend time abstracting the situation
+        return get_computer_move(played_combo, hand)
+    entry = table.get(get_situation(played_combo, hand, game_state))
+    if entry is not None:
+        move = get_action_move(entry["action"], played_combo, hand)
+        if move is not None: # the situation is abstract, so this hand may not be able to take the action
+            return move
+    return get_computer_move(played_combo, hand)
+
+get_policy_move.takes_game_state = True # step_game passes the game state, for the role and the opponents' cards left
+get_policy_move.table_path = policy_table_path # analysis.get_agent_version checksums the table the moves come from
+
+def main(argv=None):
+    """
+    Command line interface for building and saving the policy table
+    """
+    parser = argparse.ArgumentParser(description="Build Beat the Landlord policy tables from self-play.")
+    parser.add_argument("--games", type=int, default=100000, help="number of self-play games")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first deal")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="games per worker task")
+    parser.add_argument("--exploration", type=float, default=0.2, help="chance of a random action at each decision")
+    parser.add_argument("--min-games", type=int, default=200, help="fewest games behind an action for it to be trusted")
+    parser.add_argument("--margin", type=float, default=0.05, help="win rate the table's action needs over get_computer_move's")
+    parser.add_argument("--max-entries", type=int, default=20000, help="maximum number of situations kept")
+    parser.add_argument("--output", default=None, help="path to save the table to (default: the tables directory)")
+    args = parser.parse_args(argv)
+    table = run_policy_build(args.games, args.first_seed, args.workers, args.chunk_size, args.exploration,
+                             args.min_games, args.margin, args.max_entries)
+    path = args.output or policy_table_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_json_atomically(path, table)
+    print(f"Saved {len(table['entries'])} situations from {args.games} games to {path}")
+
+
+if __name__ == "__main__":
+    main()
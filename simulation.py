@@ -0,0 +1,412 @@
+"""
+Large simulation runs of computer players on seeded deals.
+
+Results are reduced into a SimulationStats aggregator as games finish instead of being kept
+in a list, so memory use stays constant no matter how many games are played. Aggregators built
+in separate worker processes are merged together, and the running totals can be snapshotted to disk.
+
+Long jobs can also be checkpointed: the completed seed ranges, the aggregator state and the state of
+the game in progress are written atomically every few seconds, so a job restarted with the same
+checkpoint path resumes without replaying finished games or counting any game twice.
+"""
+
+
+import argparse # for the command line interface
+import json # for snapshots on disk
+import multiprocessing # for playing games in worker processes
+import os # for atomic file replacement
+import tempfile # for atomic snapshot writes
+import time # for periodic snapshots
+
+import metrics
+from beat_the_landlord import DEFINED_COMBOS, SEATS, get_game_result, new_game_state, play_game, step_game
+from tournament import deal_seeded_hands, load_agent
+
+# bumped whenever the checkpoint layout changes, so old checkpoints are not misread
+CHECKPOINT_VERSION = 3
+
+class SimulationStats:
+    """
+    Constant-memory aggregator of game results. Every field is a count or a sum, so two aggregators
+    can be merged by adding their fields together.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.seat_wins = {seat: 0 for seat in SEATS}
+        self.agent_games = {} # agent name -> seats the agent held, counting each game once per seat
+        self.agent_wins = {} # agent name -> seats the agent held on the winning side
+        self.length_histogram = {} # number of moves in a game -> number of games
+        self.bombs_histogram = {} # number of bombs (and rockets) in a game -> number of games
+        self.combo_counts = {combo_type: 0 for combo_type in DEFINED_COMBOS}
+        self.loser_cards_left = 0 # total cards left in the hands of losing seats
+        self.loser_seats = 0 # number of losing seats counted in loser_cards_left
+
+    def add_game(self, result, agent_names):
+        """
+        Takes a result dictionary from play_game and the agent name playing each seat (in SEATS order)
+        as arguments and adds the game to the running totals
+        """
+        self.games += 1
+        self.seat_wins[result["winner"]] += 1
+        for seat, agent_name, cards_left in zip(SEATS, agent_names, result["cards_left"]):
+            # an agent holding several seats plays on both sides, so count it once per seat rather than once per game
+            self.agent_games[agent_name] = self.agent_games.get(agent_name, 0) + 1
+            seat_side = "landlord" if seat == "landlord" else "peasants"
+            if seat_side == result["winning_side"]:
+                self.agent_wins[agent_name] = self.agent_wins.get(agent_name, 0) + 1
+            else: # seat is on the losing side
+                self.loser_cards_left += cards_left
+                self.loser_seats += 1
+        self.length_histogram[result["moves"]] = self.length_histogram.get(result["moves"], 0) + 1
+        self.bombs_histogram[result["bombs"]] = self.bombs_histogram.get(result["bombs"], 0) + 1
+        for combo_type, count in result["combo_counts"].items():
+            self.combo_counts[combo_type] += count
+
+    def merge(self, other):
+        """
+        Takes another SimulationStats as an argument and adds its totals into this one
+        """
+        self.games += other.games
+        self.loser_cards_left += other.loser_cards_left
+        self.loser_seats += other.loser_seats
+        for mine, theirs in ((self.seat_wins, other.seat_wins),
+                             (self.agent_games, other.agent_games),
+                             (self.agent_wins, other.agent_wins),
+                             (self.length_histogram, other.length_histogram),
+                             (self.bombs_histogram, other.bombs_histogram),
+                             (self.combo_counts, other.combo_counts)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+
+    def summary(self):
+        """
+        Returns a dictionary of win rates and averages derived from the running totals
+        """
+        seat_win_rates = {}
+        for seat in SEATS:
+            seat_win_rates[seat] = self.seat_wins[seat] / self.games if self.games else 0.0
+        agent_win_rates = {}
+        for agent_name, games in self.agent_games.items():
+            agent_win_rates[agent_name] = self.agent_wins.get(agent_name, 0) / games
+        total_moves = sum(length * count for length, count in self.length_histogram.items())
+        total_bombs = sum(bombs * count for bombs, count in self.bombs_histogram.items())
+        return {"games": self.games,
+                "seat_win_rates": seat_win_rates,
+                "agent_win_rates": agent_win_rates,
+                "average_moves": total_moves / self.games if self.games else 0.0,
+                "average_bombs": total_bombs / self.games if self.games else 0.0,
+                "average_loser_cards_left": self.loser_cards_left / self.loser_seats if self.loser_seats else 0.0}
+
+    def to_dict(self):
+        """
+        Returns the aggregator state as a JSON-compatible dictionary
+        """
+        return {"games": self.games,
+                "seat_wins": self.seat_wins,
+                "agent_games": self.agent_games,
+                "agent_wins": self.agent_wins,
+                # JSON object keys are strings, so histograms are stored as [value, count] pairs
+                "length_histogram": sorted(self.length_histogram.items()),
+                "bombs_histogram": sorted(self.bombs_histogram.items()),
+                "combo_counts": self.combo_counts,
+                "loser_cards_left": self.loser_cards_left,
+                "loser_seats": self.loser_seats}
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Takes a dictionary from to_dict as an argument and returns the matching aggregator
+        """
+        stats = cls()
+        stats.games = state["games"]
+        stats.seat_wins.update(state["seat_wins"])
+        stats.agent_games.update(state["agent_games"])
+        stats.agent_wins.update(state["agent_wins"])
+        stats.length_histogram = {length: count for length, count in state["length_histogram"]}
+        stats.bombs_histogram = {bombs: count for bombs, count in state["bombs_histogram"]}
+        stats.combo_counts.update(state["combo_counts"])
+        stats.loser_cards_left = state["loser_cards_left"]
+        stats.loser_seats = state["loser_seats"]
+        return stats
+
+    def snapshot(self, path):
+        """
+        Takes a file path as an argument and atomically writes the aggregator state and summary to it
+        """
+        write_json_atomically(path, {"state": self.to_dict(), "summary": self.summary()})
+
+    @classmethod
+    def load(cls, path):
+        """
+        Takes the path of a snapshot written by snapshot as an argument and returns the saved aggregator
+        """
+        with open(path) as snapshot_file:
+            return cls.from_dict(json.load(snapshot_file)["state"])
+
+def write_json_atomically(path, data):
+    """
+    Takes a file path and JSON-compatible data as arguments and writes the data so that readers
+    only ever see either the old file or the complete new file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(file_descriptor, "w") as temporary_file:
+            json.dump(data, temporary_file, separators=(",", ":"))
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+def simulate_games(seeds, agent_specs, registry=None):
+    """
+    Takes an iterable of seeds, an agent specification ("module:function") per seat and an optional
+    metrics.MetricsRegistry as arguments, plays one game per seeded deal and returns the resulting SimulationStats.
+    """
+    move_functions = [load_agent(spec) for spec in agent_specs]
+    stats = SimulationStats()
+    for seed in seeds:
+        result = play_game(deal_seeded_hands(seed), move_functions)
+        stats.add_game(result, agent_specs)
+        if registry is not None:
+            registry.inc("btl_games_total")
+            registry.inc("btl_moves_total", result["moves"])
+    return stats
+
+def _simulate_games_task(task):
+    """
+    Takes a (seeds, agent_specs, metrics_sample_every) tuple as an argument and returns the aggregator state for
+    those games, the worker's metrics (None unless metrics_sample_every is given) and the time spent playing them.
+    Used by worker processes, which only ship the reduced state back instead of raw game records.
+    """
+    seeds, agent_specs, metrics_sample_every = task
+    start = time.perf_counter()
+    registry = None
+    if metrics_sample_every is not None: # instrument before the agents are loaded, so they are the wrapped ones
+        registry = metrics.MetricsRegistry()
+        metrics.instrument(registry, metrics_sample_every)
+    try:
+        state = simulate_games(seeds, agent_specs, registry).to_dict()
+    finally:
+        if registry is not None:
+            metrics.uninstrument()
+    if registry is not None:
+        registry = registry.to_dict()
+    return state, registry, time.perf_counter() - start
+
+def add_completed_range(completed, start, stop):
+    """
+    Takes a sorted list of [start, stop) seed ranges and a newly completed range as arguments and
+    inserts the range into the list in place, merging it with any ranges it touches
+    """
+    merged = [start, stop]
+    remaining = []
+    for completed_range in completed:
+        if completed_range[1] < merged[0] or completed_range[0] > merged[1]: # no overlap and not adjacent
+            remaining.append(completed_range)
+        else:
+            merged = [min(merged[0], completed_range[0]), max(merged[1], completed_range[1])]
+    remaining.append(merged)
+    remaining.sort()
+    completed[:] = remaining
+
+def pending_seed_ranges(completed, first_seed, games, chunk_size):
+    """
+    Takes a sorted list of completed [start, stop) seed ranges, a first seed, a number of games and a chunk size
+    as arguments and returns the seeds of the job that are not completed yet as a list of ranges of at most
+    chunk_size seeds
+    """
+    chunks = []
+    start = first_seed
+    job_stop = first_seed + games
+    for completed_start, completed_stop in completed + [[job_stop, job_stop]]:
+        stop = min(completed_start, job_stop)
+        for chunk_start in range(start, stop, chunk_size): # split the gap before this completed range
+            chunks.append(range(chunk_start, min(chunk_start + chunk_size, stop)))
+        start = max(start, completed_stop)
+    return chunks
+
+def checkpoint_data(job, completed, stats, in_progress):
+    """
+    Takes the job description, the completed seed ranges, the aggregator and a dictionary of in-progress game states
+    keyed by seed as arguments and returns the checkpoint contents as a copy, which stays as it is while the job goes on
+    """
+    data = {"version": CHECKPOINT_VERSION,
+            "job": job,
+            "completed": completed,
+            "stats": stats.to_dict(),
+            "in_progress": {str(seed): state for seed, state in in_progress.items()}}
+    return json.loads(json.dumps(data))
+
+def save_checkpoint(path, job, completed, stats, in_progress):
+    """
+    Takes a checkpoint path, the job description, the completed seed ranges, the aggregator and a dictionary
+    of in-progress game states keyed by seed as arguments and atomically writes the checkpoint
+    """
+    write_json_atomically(path, checkpoint_data(job, completed, stats, in_progress))
+
+def load_checkpoint(path, job):
+    """
+    Takes a checkpoint path and the job description as arguments and returns the saved
+    (completed seed ranges, aggregator, in-progress game states keyed by seed), or an empty start
+    if no checkpoint exists yet. Raises ValueError if the checkpoint belongs to a different job.
+    """
+    if not os.path.exists(path):
+        return [], SimulationStats(), {}
+    with open(path) as checkpoint_file:
+        checkpoint = json.load(checkpoint_file)
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"unsupported checkpoint version: {checkpoint.get('version')}")
+    if checkpoint["job"] != job:
+        raise ValueError(f"checkpoint {path} belongs to a different job: {checkpoint['job']}")
+    in_progress = {int(seed): state for seed, state in checkpoint["in_progress"].items()}
+    return checkpoint["completed"], SimulationStats.from_dict(checkpoint["stats"]), in_progress
+
+def run_simulation(games, agent_specs, first_seed=0, workers=1, chunk_size=1000,
+                   snapshot_path=None, snapshot_interval=60.0, checkpoint_path=None, checkpoint_interval=5.0,
+                   registry=None, metrics_sample_every=100):
+    """
+    Takes a number of games, an agent specification per seat, a first seed, a number of worker processes,
+    a chunk size, an optional snapshot path, a snapshot interval in seconds, an optional checkpoint path
+    and a checkpoint interval in seconds as arguments.
+    Plays the games in chunks, merging each chunk's aggregator as it completes and snapshotting the
+    running totals at most every snapshot_interval seconds (and once at the end). Returns the SimulationStats.
+    With a checkpoint path, the job resumes from an existing checkpoint and writes a new one at most every
+    checkpoint_interval seconds and when it stops. Games in worker processes are checkpointed per chunk,
+    while a single-process job also saves the game in progress.
+    With a metrics.MetricsRegistry, throughput, sampled latencies of one decision in every metrics_sample_every
+    and the workers' utilization and queue are recorded in it as the job runs.
+    """
+    agent_specs = list(agent_specs)
+    job = {"games": games, "first_seed": first_seed, "agent_specs": agent_specs}
+    if checkpoint_path is not None:
+        completed, stats, in_progress = load_checkpoint(checkpoint_path, job)
+    else:
+        completed, stats, in_progress = [], SimulationStats(), {}
+    last_snapshot = time.monotonic()
+    last_checkpoint = time.monotonic()
+    # checkpoint contents from the last point where stats, completed and in_progress agreed, which is what gets
+    # saved when the job stops: an interrupt can land between counting a game and marking its seed completed
+    consistent_progress = None
+
+    def save_progress(recorded=False):
+        """
+        Only called where stats, completed and in_progress agree. Saves a snapshot and a checkpoint if they are due,
+        and remembers the progress for the final save if it was saved or a game or chunk was just recorded.
+        """
+        nonlocal last_snapshot, last_checkpoint, consistent_progress
+        if snapshot_path is None and checkpoint_path is None:
+            return
+        now = time.monotonic()
+        snapshot_due = snapshot_path is not None and now - last_snapshot >= snapshot_interval
+        checkpoint_due = checkpoint_path is not None and now - last_checkpoint >= checkpoint_interval
+        if not (recorded or snapshot_due or checkpoint_due):
+            return
+        consistent_progress = checkpoint_data(job, completed, stats, in_progress)
+        if snapshot_due:
+            stats.snapshot(snapshot_path)
+            last_snapshot = now
+        if checkpoint_due:
+            write_json_atomically(checkpoint_path, consistent_progress)
+            last_checkpoint = now
+
+    chunks = pending_seed_ranges(completed, first_seed, games, chunk_size)
+    save_progress(recorded=True) # the loaded (or empty) progress is the first consistent point
+    if registry is not None:
+        registry.set("btl_workers", max(workers, 1))
+    try:
+        if workers <= 1:
+            if registry is not None: # instrument before the agents are loaded, so they are the wrapped ones
+                metrics.instrument(registry, metrics_sample_every)
+            move_functions = [load_agent(spec) for spec in agent_specs]
+            for chunk in chunks:
+                for seed in chunk:
+                    if seed in in_progress: # resume the game that was interrupted
+                        game_state = in_progress[seed]
+                    else:
+                        game_state = new_game_state(deal_seeded_hands(seed))
+                        in_progress[seed] = game_state
+                    while game_state["winner"] is None:
+                        step_game(game_state, move_functions)
+                        if checkpoint_path is not None:
+                            save_progress()
+                    # record the finished game and its seed together, so a checkpoint never counts it twice
+                    del in_progress[seed]
+                    result = get_game_result(game_state)
+                    stats.add_game(result, agent_specs)
+                    if registry is not None:
+                        registry.inc("btl_games_total")
+                        registry.inc("btl_moves_total", result["moves"])
+                    add_completed_range(completed, seed, seed + 1)
+                    save_progress(recorded=True)
+        else:
+            in_progress.clear() # games in worker processes restart from the beginning of their chunk
+            sample_every = metrics_sample_every if registry is not None else None
+            tasks = [(chunk, tuple(agent_specs), sample_every) for chunk in chunks]
+            if registry is not None:
+                pool_start = time.monotonic()
+                finished_tasks = [0]
+                def report_workers():
+                    remaining = len(tasks) - finished_tasks[0]
+                    registry.set("btl_tasks_in_flight", min(remaining, workers))
+                    registry.set("btl_queue_depth", max(remaining - workers, 0))
+                    busy_seconds = registry.get("btl_worker_busy_seconds_total")
+                    registry.set("btl_worker_utilization", busy_seconds / max(workers * (time.monotonic() - pool_start), 1e-9))
+                registry.add_collector(report_workers)
+            with multiprocessing.Pool(workers) as pool:
+                for chunk, (state, worker_metrics, busy_seconds) in zip(chunks, pool.imap(_simulate_games_task, tasks)):
+                    chunk_stats = SimulationStats.from_dict(state)
+                    stats.merge(chunk_stats)
+                    if registry is not None:
+                        registry.merge(worker_metrics) # includes the chunk's games and moves
+                        registry.inc("btl_worker_busy_seconds_total", busy_seconds)
+                        finished_tasks[0] += 1
+                    add_completed_range(completed, chunk.start, chunk.stop)
+                    save_progress(recorded=True)
+    finally: # also save when the job is interrupted, from the last consistent point rather than the bookkeeping as it stands
+        if registry is not None and workers <= 1:
+            metrics.uninstrument()
+        if consistent_progress is not None:
+            if snapshot_path is not None:
+                SimulationStats.from_dict(consistent_progress["stats"]).snapshot(snapshot_path)
+            if checkpoint_path is not None:
+                write_json_atomically(checkpoint_path, consistent_progress)
+    return stats
+
+def main(argv=None):
+    """
+    Command line interface for running a simulation and printing its summary
+    """
+    parser = argparse.ArgumentParser(description="Simulate Beat the Landlord games between computer players.")
+    parser.add_argument("--games", type=int, default=10000, help="number of games to play")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first deal")
+    parser.add_argument("--agents", nargs=len(SEATS), metavar="MODULE:FUNCTION",
+                        default=["beat_the_landlord:get_computer_move"] * len(SEATS),
+                        help="agent for each seat: " + ", ".join(SEATS))
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="games per worker task")
+    parser.add_argument("--snapshot", help="path of the JSON snapshot to write")
+    parser.add_argument("--snapshot-interval", type=float, default=60.0, help="seconds between snapshots")
+    parser.add_argument("--checkpoint", help="path of the checkpoint to resume from and write to")
+    parser.add_argument("--checkpoint-interval", type=float, default=5.0, help="seconds between checkpoints")
+    parser.add_argument("--metrics", metavar="ADDRESS", help="serve live metrics at HOST:PORT or unix:PATH")
+    parser.add_argument("--metrics-sample-every", type=int, default=100, help="time one decision in this many")
+    args = parser.parse_args(argv)
+    registry = None
+    server = None
+    if args.metrics is not None:
+        registry = metrics.MetricsRegistry()
+        server = metrics.start_metrics_server(registry, args.metrics)
+    try:
+        stats = run_simulation(args.games, args.agents, args.first_seed, args.workers, args.chunk_size,
+                               args.snapshot, args.snapshot_interval, args.checkpoint, args.checkpoint_interval,
+                               registry, args.metrics_sample_every)
+    finally:
+        if server is not None:
+            metrics.stop_metrics_server(server)
+    print(json.dumps(stats.summary(), indent=4))
+
+
+if __name__ == "__main__":
+    main()
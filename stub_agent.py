@@ -0,0 +1,36 @@
+"""
+Reference external agent for external_agents.py. It speaks the line-based JSON protocol on stdin/stdout
+and plays like get_computer_move, so matches against get_computer_move are even.
+
+    python stub_agent.py [--delay SECONDS]
+
+The optional delay before every move is for exercising move timeouts.
+"""
+
+
+import argparse # for the command line interface
+import json # for the line-based protocol
+import sys # for stdin and stdout
+import time # for the optional delay
+
+from beat_the_landlord import get_computer_move
+
+def main(argv=None):
+    """
+    Reads protocol messages from stdin until it closes and answers every move request on stdout
+    """
+    parser = argparse.ArgumentParser(description="Reference Beat the Landlord agent for the external agent protocol.")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before every move")
+    args = parser.parse_args(argv)
+    for line in sys.stdin:
+        message = json.loads(line)
+        if message["type"] == "request_move": # deal, observation and result messages need no answer
+            if args.delay > 0:
+                time.sleep(args.delay)
+            move = get_computer_move(message["played_combo"], message["hand"])
+            sys.stdout.write(json.dumps({"type": "move", "move": move}) + "\n")
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os # for the repository path
+import sys # for importing the game modules
+
+# the game modules live at the top of the repository rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
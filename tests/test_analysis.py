@@ -0,0 +1,13 @@
+import analysis
+import policy
+
+def test_agent_version_follows_the_policy_table(tmp_path, monkeypatch):
+    table_path = tmp_path / "policy-v1.json"
+    monkeypatch.setattr(policy.get_policy_move, "table_path", lambda: str(table_path))
+    specs = ["policy:get_policy_move"] * 3
+    without_table = analysis.get_agent_version(specs)
+    table_path.write_text('{"entries": {}}')
+    with_table = analysis.get_agent_version(specs)
+    table_path.write_text('{"entries": {"x": 1}}')
+    assert len({without_table, with_table, analysis.get_agent_version(specs)}) == 3
+    assert analysis.get_agent_version(["beat_the_landlord:get_computer_move"] * 3) != without_table
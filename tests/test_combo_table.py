@@ -0,0 +1,41 @@
+import os # for the table file
+import random # for a full deck
+import subprocess # for fingerprinting in processes with other hash seeds
+import sys # for running this Python
+
+import beat_the_landlord
+from beat_the_landlord import (DEFINED_COMBOS, _classify_combo_rank, _classify_combo_type, _lookup_combo,
+                               _parse_combo_table, _rules_fingerprint, generate_shuffled_deck, iter_combos)
+
+def test_saved_table_agrees_with_the_classification(tmp_path, monkeypatch):
+    monkeypatch.setattr(beat_the_landlord, "TABLES_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(beat_the_landlord, "_combo_table", None)
+    beat_the_landlord._get_combo_table() # builds and saves the table
+    assert os.path.exists(beat_the_landlord.combo_table_path())
+    monkeypatch.setattr(beat_the_landlord, "_combo_table", None)
+    keys, values = beat_the_landlord._get_combo_table() # memory-mapped from the saved file
+    full_deck = generate_shuffled_deck(random.Random(0))
+    combos = 0
+    for combo_type in DEFINED_COMBOS:
+        for combo in iter_combos(full_deck, combo_type):
+            assert _lookup_combo(combo) == (_classify_combo_type(combo), _classify_combo_rank(combo))
+            combos += 1
+    assert combos == len(keys)
+
+def test_fingerprint_is_the_same_in_every_process():
+    fingerprints = set()
+    for hash_seed in ("1", "2", "3"):
+        environment = dict(os.environ, PYTHONHASHSEED=hash_seed)
+        output = subprocess.run([sys.executable, "-c", "import beat_the_landlord; print(beat_the_landlord._rules_fingerprint())"],
+                                env=environment, check=True, capture_output=True, text=True,
+                                cwd=os.path.dirname(beat_the_landlord.__file__)).stdout
+        fingerprints.add(int(output))
+    assert fingerprints == {_rules_fingerprint()}
+
+def test_changed_classification_rejects_the_saved_table(monkeypatch):
+    contents = beat_the_landlord.build_combo_table()
+    assert _parse_combo_table(contents) is not None
+    def is_rocket(combo, rules=None): # a different classification than the real one
+        return False
+    monkeypatch.setattr(beat_the_landlord, "is_rocket", is_rocket)
+    assert _parse_combo_table(contents) is None
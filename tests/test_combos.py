@@ -0,0 +1,65 @@
+import hashlib # for pinning the order of many generated combos at once
+import json # for hashing combos
+
+import pytest
+
+from beat_the_landlord import DEFINED_COMBOS, TWO_DECK_RULES, Hand, count_combos, get_combos, iter_combos
+from tournament import deal_seeded_hands
+
+# get_combos of every combo type for every hand of seeds 0-99, as generated by the engine before combos were
+# enumerated lazily (the two were compared hand by hand), so any change to the order shows up here
+SEEDED_COMBOS_SHA1 = "8bdf6b79a5d997ef63577cfafa05027435b3041f"
+
+TRIPLET_RUN_HAND = ["3", "3", "3", "4", "4", "4", "5", "5", "6", "7", "B", "R"]
+QUAD_HAND = ["5", "5", "5", "5", "6", "6", "7", "7", "8", "B", "R"]
+
+def test_seeded_combo_order_is_pinned():
+    checksum = hashlib.sha1()
+    for seed in range(100):
+        for hand in deal_seeded_hands(seed):
+            for combo_type in DEFINED_COMBOS:
+                checksum.update(json.dumps(get_combos(hand, combo_type)).encode())
+    assert checksum.hexdigest() == SEEDED_COMBOS_SHA1
+
+def test_kicker_combos_of_a_triplet_run_with_both_jokers():
+    assert get_combos(TRIPLET_RUN_HAND, "triplet with pair") == [["3", "3", "3", "4", "4"], ["3", "3", "3", "5", "5"],
+                                                                 ["4", "4", "4", "3", "3"], ["4", "4", "4", "5", "5"]]
+    # the two Jokers together are the rocket, so they are never both attachments
+    assert get_combos(TRIPLET_RUN_HAND, "sequence of triplets with singles") == [
+        ["3", "3", "3", "4", "4", "4", "5", "6"], ["3", "3", "3", "4", "4", "4", "5", "7"],
+        ["3", "3", "3", "4", "4", "4", "5", "B"], ["3", "3", "3", "4", "4", "4", "5", "R"],
+        ["3", "3", "3", "4", "4", "4", "6", "7"], ["3", "3", "3", "4", "4", "4", "6", "B"],
+        ["3", "3", "3", "4", "4", "4", "6", "R"], ["3", "3", "3", "4", "4", "4", "7", "B"],
+        ["3", "3", "3", "4", "4", "4", "7", "R"]]
+    assert get_combos(TRIPLET_RUN_HAND, "sequence of triplets with pairs") == []
+    assert get_combos(TRIPLET_RUN_HAND, "rocket") == [["B", "R"]]
+
+def test_quad_attachments_with_both_jokers():
+    assert get_combos(QUAD_HAND, "quad with two singles") == [
+        ["5", "5", "5", "5", "6", "7"], ["5", "5", "5", "5", "6", "8"], ["5", "5", "5", "5", "6", "B"],
+        ["5", "5", "5", "5", "6", "R"], ["5", "5", "5", "5", "7", "8"], ["5", "5", "5", "5", "7", "B"],
+        ["5", "5", "5", "5", "7", "R"], ["5", "5", "5", "5", "8", "B"], ["5", "5", "5", "5", "8", "R"]]
+    assert get_combos(QUAD_HAND, "quad with two pairs") == [["5", "5", "5", "5", "6", "6", "7", "7"]]
+
+def test_iter_combos_is_lazy_and_matches_get_combos():
+    combos = iter_combos(TRIPLET_RUN_HAND, "triplet with single")
+    assert next(combos) == ["3", "3", "3", "4"]
+    assert [["3", "3", "3", "4"]] + list(combos) == get_combos(TRIPLET_RUN_HAND, "triplet with single")
+    assert get_combos(Hand(TRIPLET_RUN_HAND), "sequence of triplets with singles") == \
+        get_combos(TRIPLET_RUN_HAND, "sequence of triplets with singles")
+
+@pytest.mark.parametrize("combo_type", DEFINED_COMBOS)
+def test_count_combos_matches_get_combos(combo_type):
+    hands = [TRIPLET_RUN_HAND, QUAD_HAND,
+             ["3", "3", "3", "4", "4", "4", "5", "5", "5", "6", "6", "B", "R"], # triplet run with pairs and both Jokers
+             ["9", "9", "9", "10", "10", "10", "J", "J", "J", "Q", "Q", "Q", "2", "2", "B"],
+             ["B", "R"], ["B"], ["2", "2", "2", "2", "B", "R"]]
+    hands += [hand for seed in range(100) for hand in deal_seeded_hands(seed)]
+    for hand in hands:
+        assert count_combos(hand, combo_type) == len(get_combos(hand, combo_type))
+        assert count_combos(Hand(hand), combo_type) == len(get_combos(hand, combo_type))
+
+def test_count_combos_matches_get_combos_with_two_decks():
+    hand = ["3"] * 5 + ["4"] * 3 + ["5"] * 3 + ["6", "6", "7", "B", "B", "R", "R"]
+    for combo_type in DEFINED_COMBOS:
+        assert count_combos(hand, combo_type, TWO_DECK_RULES) == len(get_combos(hand, combo_type, TWO_DECK_RULES))
@@ -0,0 +1,55 @@
+import os # for the stub agent's path
+import sys # for running agents with this Python
+import time # for a slow landlord
+
+from beat_the_landlord import get_computer_move
+from external_agents import AgentPool, _acquire_players, _release_players, play_external_game, run_external_match
+from tournament import deal_seeded_hands
+
+STUB_AGENT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "stub_agent.py")
+
+def test_stub_agent_plays_even_with_get_computer_move():
+    pool = AgentPool([sys.executable, STUB_AGENT], 2)
+    try:
+        summary = run_external_match(pool, get_computer_move, deals=2, move_timeout=5.0)
+        report = pool.latency_report()
+    finally:
+        pool.close()
+    assert summary["forfeits"] == 0
+    assert summary["score"] == 0.5 # the stub plays exactly like get_computer_move
+    assert report["moves"] > 0 and report["timeouts"] == 0 and report["errors"] == 0
+
+def test_slow_agent_forfeits_on_timeout():
+    pool = AgentPool([sys.executable, STUB_AGENT, "--delay", "2"], 1)
+    try:
+        players = _acquire_players(pool, 1) + [get_computer_move, get_computer_move]
+        result = play_external_game(deal_seeded_hands(0), players, move_timeout=0.2)
+        _release_players(players, result)
+        assert result["forfeit"] == "landlord"
+        assert result["winning_side"] == "peasants"
+        assert pool.timeouts == 1
+        assert pool.agents[0].process.poll() is None # restarted, so the late answer can't be read as the next move
+    finally:
+        pool.close()
+
+def test_agent_that_exits_between_moves_forfeits_and_is_restarted():
+    # reads its deal message and exits, so the first observation it is sent fails
+    pool = AgentPool([sys.executable, "-c", "import sys; sys.stdin.readline()"], 2)
+
+    def slow_landlord(played_combo, hand):
+        time.sleep(0.5) # give the agents time to exit
+        return get_computer_move(played_combo, hand)
+
+    try:
+        players = [slow_landlord] + _acquire_players(pool, 2)
+        first_processes = [player[0].process for player in players[1:]]
+        result = play_external_game(deal_seeded_hands(0), players, move_timeout=1.0)
+        _release_players(players, result)
+        assert result["forfeit"] == "peasant 1"
+        assert result["winning_side"] == "landlord"
+        assert sorted(result["failed_seats"]) == ["peasant 1", "peasant 2"]
+        for player, first_process in zip(players[1:], first_processes):
+            assert player[0].process is not first_process
+            assert player[0].process.poll() is None
+    finally:
+        pool.close()
@@ -0,0 +1,25 @@
+import functools # for binding rules to move functions
+import json # for saving game states
+
+from beat_the_landlord import (RULES, STANDARD_RULES, get_computer_move, get_game_rules, new_game_state, play_game,
+                               step_game)
+from tournament import deal_seeded_hands
+
+def test_custom_rules_are_played():
+    rules = dict(STANDARD_RULES, name="no quad attachments", quad_attachments=False)
+    move_function = functools.partial(get_computer_move, rules=rules)
+    result = play_game(deal_seeded_hands(1), [move_function] * 3, rules)
+    assert result["winner"] in ("landlord", "peasant 1", "peasant 2")
+    assert "quad with two singles" not in result["combo_counts"]
+    assert "quad with two pairs" not in result["combo_counts"]
+
+def test_saved_states_get_their_registered_rules_back():
+    state = new_game_state(deal_seeded_hands(2))
+    assert state["rules"] is STANDARD_RULES
+    step_game(state, [get_computer_move] * 3)
+    loaded_state = json.loads(json.dumps(state))
+    assert loaded_state["rules"] == STANDARD_RULES and loaded_state["rules"] is not STANDARD_RULES
+    step_game(loaded_state, [get_computer_move] * 3)
+    assert loaded_state["rules"] is STANDARD_RULES
+    old_state = json.loads(json.dumps(dict(state, rules="standard"))) # saved when states held the rules' name
+    assert get_game_rules(old_state) is RULES["standard"]
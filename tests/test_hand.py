@@ -0,0 +1,44 @@
+import copy # for copying hands
+import json # for saving hands
+import pickle # for sending hands to worker processes
+
+import pytest
+
+from beat_the_landlord import Hand
+
+def test_hand_changes_only_through_combos():
+    hand = Hand(["5", "3", "3", "R"])
+    assert hand == ["3", "3", "5", "R"]
+    hand.remove_combo(["3", "3"])
+    hand.add_combo(["4"])
+    assert hand == ["4", "5", "R"]
+    assert hand.rank_counts() == {"4": 1, "5": 1, "R": 1}
+
+@pytest.mark.parametrize("change", [lambda hand: hand.append("3"),
+                                    lambda hand: hand.extend(["3"]),
+                                    lambda hand: hand.insert(0, "3"),
+                                    lambda hand: hand.pop(),
+                                    lambda hand: hand.remove("5"),
+                                    lambda hand: hand.clear(),
+                                    lambda hand: hand.sort(),
+                                    lambda hand: hand.reverse(),
+                                    lambda hand: hand.__setitem__(0, "4"),
+                                    lambda hand: hand.__setitem__(slice(0, 1), []),
+                                    lambda hand: hand.__delitem__(0),
+                                    lambda hand: hand.__iadd__(["3"]),
+                                    lambda hand: hand.__imul__(2)])
+def test_list_changes_are_refused(change):
+    hand = Hand(["3", "5"])
+    with pytest.raises(TypeError):
+        change(hand)
+    assert hand == ["3", "5"] and hand.rank_counts() == {"3": 1, "5": 1}
+
+@pytest.mark.parametrize("duplicate", [copy.copy, copy.deepcopy, lambda hand: pickle.loads(pickle.dumps(hand))])
+def test_copies_keep_their_own_counts(duplicate):
+    hand = Hand(["3", "3", "5"])
+    hand_copy = duplicate(hand)
+    hand_copy.remove_combo(["3"])
+    assert isinstance(hand_copy, Hand)
+    assert hand.rank_counts() == {"3": 2, "5": 1}
+    assert hand_copy.rank_counts() == {"3": 1, "5": 1}
+    assert json.loads(json.dumps(hand)) == ["3", "3", "5"]
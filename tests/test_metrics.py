@@ -0,0 +1,60 @@
+import socket # for scraping over a Unix socket
+import urllib.request # for scraping over HTTP
+
+import beat_the_landlord
+import metrics
+from simulation import run_simulation
+
+FUNCTIONS = ("get_computer_move", "get_combos", "is_playable")
+
+def scrape_unix_socket(path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        client.sendall(b"GET /metrics HTTP/1.0\r\nHost: localhost\r\n\r\n")
+        response = b""
+        while True:
+            data = client.recv(65536)
+            if not data:
+                break
+            response += data
+    headers, separator, body = response.decode().partition("\r\n\r\n")
+    assert headers.startswith("HTTP/1.0 200")
+    return body
+
+def check_scrape(text):
+    for name, (metric_type, help_text) in metrics.METRICS.items():
+        assert f"# TYPE {name} {metric_type}" in text
+    for function in FUNCTIONS:
+        count_line = [line for line in text.splitlines() if line.startswith(f'btl_function_seconds_count{{function="{function}"}}')]
+        assert len(count_line) == 1 and int(count_line[0].split()[-1]) > 0
+    assert float(text.split("\nbtl_games_total ")[1].split()[0]) == 20
+
+def test_simulation_metrics_are_served_over_http_and_unix_socket(tmp_path):
+    registry = metrics.MetricsRegistry()
+    http_server = metrics.start_metrics_server(registry, "127.0.0.1:0")
+    unix_server = metrics.start_metrics_server(registry, "unix:" + str(tmp_path / "metrics.sock"))
+    try:
+        run_simulation(20, ["beat_the_landlord:get_computer_move"] * 3, workers=2, chunk_size=5,
+                       registry=registry, metrics_sample_every=1)
+        host, port = http_server.server_address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            check_scrape(response.read().decode())
+        check_scrape(scrape_unix_socket(str(tmp_path / "metrics.sock")))
+    finally:
+        metrics.stop_metrics_server(http_server)
+        metrics.stop_metrics_server(unix_server)
+
+def test_only_calls_made_by_a_sampled_decision_are_timed():
+    registry = metrics.MetricsRegistry()
+    metrics.instrument(registry, sample_every=1)
+    try:
+        assert beat_the_landlord._metrics_sampler is None # set only while a decision runs
+        beat_the_landlord.get_computer_move(None, ["3", "3", "4"])
+        beat_the_landlord.is_playable(["3"], ["4"]) # outside a decision, so not timed
+    finally:
+        metrics.uninstrument()
+    assert beat_the_landlord._metrics_sampler is None
+    text = registry.render()
+    assert 'btl_function_seconds_count{function="get_combos"} 1' in text
+    assert 'btl_function_seconds_count{function="is_playable"}' not in text
+    assert "btl_decisions_total 1" in text
@@ -0,0 +1,31 @@
+from beat_the_landlord import SEATS, get_computer_move, get_game_result, new_game_state, play_game, step_game
+from playout import load_hands, playout
+from tournament import deal_seeded_hands
+
+def test_playouts_finish_like_play_game():
+    for seed in range(300):
+        hands = deal_seeded_hands(seed)
+        result = play_game(hands, [get_computer_move] * 3)
+        hand_keys = [0, 0, 0]
+        cards_left = [0, 0, 0]
+        load_hands(hands, hand_keys, cards_left)
+        winner = playout(hand_keys, cards_left)
+        assert (SEATS[winner], cards_left) == (result["winner"], result["cards_left"]), seed
+
+def test_playouts_from_the_middle_of_a_game_finish_like_step_game():
+    for seed in range(100):
+        state = new_game_state(deal_seeded_hands(seed))
+        for move_number in range(seed % 25): # stop at a different point of each game, often in the middle of a round
+            if state["winner"] is not None:
+                break
+            step_game(state, [get_computer_move] * 3)
+        if state["winner"] is not None:
+            continue
+        hand_keys = [0, 0, 0]
+        cards_left = [0, 0, 0]
+        load_hands(state["hands"], hand_keys, cards_left)
+        winner = playout(hand_keys, cards_left, state["current_index"], state["last_played_combo"], state["passes_in_a_row"])
+        while state["winner"] is None:
+            step_game(state, [get_computer_move] * 3)
+        result = get_game_result(state)
+        assert (SEATS[winner], cards_left) == (result["winner"], result["cards_left"]), seed
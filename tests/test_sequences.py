@@ -0,0 +1,88 @@
+import random # for random rank masks
+
+import pytest
+
+from beat_the_landlord import (DEFINED_COMBOS, RANK_ORDER, SEQUENCE_RANKS_MASK, _classify_combo_type, _find_runs,
+                               _is_run, _ranks_mask, get_combos, is_sequence_of_pairs, is_sequence_of_singles,
+                               is_sequence_of_triplets, is_sequence_of_triplets_with_pairs,
+                               is_sequence_of_triplets_with_singles)
+from tournament import deal_seeded_hands
+
+# (validator, combo, expected answer), checked against the engine before sequences were detected with bitmasks
+SEQUENCE_CASES = [
+    (is_sequence_of_singles, ["3", "4", "5", "6", "7"], True),
+    (is_sequence_of_singles, ["10", "J", "Q", "K", "A"], True),
+    (is_sequence_of_singles, ["A", "K", "Q", "J", "10"], True),
+    (is_sequence_of_singles, ["3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"], True),
+    (is_sequence_of_singles, ["J", "Q", "K", "A", "2"], False),
+    (is_sequence_of_singles, ["3", "4", "5", "6"], False),
+    (is_sequence_of_singles, ["3", "4", "5", "6", "8"], False),
+    (is_sequence_of_singles, ["3", "4", "5", "6", "6"], False),
+    (is_sequence_of_singles, ["B", "R", "3", "4", "5"], False),
+    (is_sequence_of_pairs, ["3", "3", "4", "4", "5", "5"], True),
+    (is_sequence_of_pairs, ["5", "5", "3", "3", "4", "4"], True),
+    (is_sequence_of_pairs, ["Q", "Q", "K", "K", "A", "A"], True),
+    (is_sequence_of_pairs, ["3", "3", "4", "4"], False),
+    (is_sequence_of_pairs, ["K", "K", "A", "A", "2", "2"], False),
+    (is_sequence_of_pairs, ["3", "3", "4", "4", "6", "6"], False),
+    (is_sequence_of_pairs, ["3", "3", "3", "4", "4", "5", "5"], False),
+    (is_sequence_of_triplets, ["3", "3", "3", "4", "4", "4"], True),
+    (is_sequence_of_triplets, ["K", "K", "K", "A", "A", "A"], True),
+    (is_sequence_of_triplets, ["3", "3", "3", "4", "4", "4", "5", "5", "5"], True),
+    (is_sequence_of_triplets, ["3", "3", "3"], False),
+    (is_sequence_of_triplets, ["A", "A", "A", "2", "2", "2"], False),
+    (is_sequence_of_triplets, ["3", "3", "3", "5", "5", "5"], False),
+    (is_sequence_of_triplets, ["3", "3", "3", "4", "4", "4", "4"], False),
+    (is_sequence_of_triplets_with_singles, ["3", "3", "3", "4", "4", "4", "5", "6"], True),
+    (is_sequence_of_triplets_with_singles, ["3", "3", "3", "4", "4", "4", "B", "7"], True),
+    (is_sequence_of_triplets_with_singles, ["3", "3", "3", "4", "4", "4", "5", "5", "5", "6", "7", "8"], True),
+    (is_sequence_of_triplets_with_singles, ["3", "3", "3", "4", "4", "4", "5", "5"], False),
+    (is_sequence_of_triplets_with_singles, ["3", "3", "3", "4", "4", "4", "B", "R"], False), # both Jokers are the rocket
+    (is_sequence_of_triplets_with_singles, ["3", "3", "3", "4", "4", "4", "5"], False),
+    (is_sequence_of_triplets_with_singles, ["3", "3", "3", "4", "4", "4", "3", "6"], False),
+    (is_sequence_of_triplets_with_singles, ["3", "3", "3", "4", "4", "4", "4", "5"], False),
+    (is_sequence_of_triplets_with_singles, ["3", "3", "3", "4", "4", "4", "5", "5", "5", "6"], False),
+    (is_sequence_of_triplets_with_singles, ["A", "A", "A", "2", "2", "2", "3", "4"], False),
+    (is_sequence_of_triplets_with_pairs, ["3", "3", "3", "4", "4", "4", "5", "5", "6", "6"], True),
+    (is_sequence_of_triplets_with_pairs, ["3", "3", "3", "4", "4", "4", "5", "5", "5", "6", "6", "7", "7", "8", "8"], True),
+    (is_sequence_of_triplets_with_pairs, ["3", "3", "3", "4", "4", "4", "5", "5", "5", "5"], False),
+    (is_sequence_of_triplets_with_pairs, ["3", "3", "3", "4", "4", "4", "5", "5", "B", "R"], False),
+    (is_sequence_of_triplets_with_pairs, ["3", "3", "3", "4", "4", "4", "5", "5"], False),
+    (is_sequence_of_triplets_with_pairs, ["3", "3", "3", "4", "4", "4", "5", "5", "6", "7"], False),
+    (is_sequence_of_triplets_with_pairs, ["3", "3", "3", "5", "5", "5", "6", "6", "7", "7"], False),
+]
+
+@pytest.mark.parametrize("validator, combo, expected", SEQUENCE_CASES)
+def test_sequence_validators(validator, combo, expected):
+    assert validator(combo) == expected
+
+def test_is_run():
+    assert _is_run(_ranks_mask(["3", "4", "5"]))
+    assert _is_run(_ranks_mask(["A"]))
+    assert not _is_run(0)
+    assert not _is_run(_ranks_mask(["3", "5"]))
+    assert not _is_run(_ranks_mask(["K", "A", "2"]))
+    assert not _is_run(_ranks_mask(["B", "R"]))
+
+def test_find_runs_matches_a_rank_by_rank_search():
+    rng = random.Random(0)
+    masks = [0, (1 << len(RANK_ORDER)) - 1, _ranks_mask(["3", "4", "5", "6", "7", "9", "10", "J", "Q", "K", "A", "2"])]
+    masks += [rng.getrandbits(len(RANK_ORDER)) for i in range(500)]
+    for possible_lengths in ((5, 6, 7, 8, 9, 10, 11, 12), (3, 4, 5, 6, 7, 8, 9, 10), (2, 3, 4, 5, 6)):
+        for mask in masks:
+            expected = []
+            for length in possible_lengths:
+                for start in range(len(RANK_ORDER) - length + 1):
+                    run_mask = ((1 << length) - 1) << start
+                    if run_mask & ~SEQUENCE_RANKS_MASK == 0 and mask & run_mask == run_mask:
+                        expected.append((start, length))
+            assert _find_runs(mask, possible_lengths) == expected
+
+def test_generated_combos_are_classified_as_their_type():
+    hands = [["3", "3", "3", "4", "4", "4", "5", "5", "5", "6", "6", "B", "R"],
+             ["10", "10", "10", "J", "J", "J", "Q", "Q", "Q", "K", "K", "K", "A", "A", "A", "2", "B", "R"]]
+    hands += [hand for seed in range(50) for hand in deal_seeded_hands(seed)]
+    for hand in hands:
+        for combo_type in DEFINED_COMBOS:
+            for combo in get_combos(hand, combo_type):
+                assert _classify_combo_type(combo) == combo_type
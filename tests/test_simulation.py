@@ -0,0 +1,39 @@
+import pytest
+
+import simulation
+from simulation import SimulationStats
+
+def make_result(winner):
+    return {"winner": winner,
+            "winning_side": "landlord" if winner == "landlord" else "peasants",
+            "moves": 30,
+            "bombs": 0,
+            "combo_counts": {"single": 30},
+            "cards_left": [0 if winner == "landlord" else 5, 0 if winner == "peasant 1" else 4, 3]}
+
+def test_agent_win_rates_count_every_seat_held():
+    stats = SimulationStats()
+    stats.add_game(make_result("landlord"), ["a", "a", "a"]) # self-play: one winning seat out of three
+    stats.add_game(make_result("peasant 1"), ["a", "b", "b"])
+    assert stats.agent_games == {"a": 4, "b": 2}
+    assert stats.agent_wins == {"a": 1, "b": 2}
+    assert stats.summary()["agent_win_rates"] == {"a": 0.25, "b": 1.0}
+
+def test_interrupted_bookkeeping_is_not_counted_twice_on_resume(tmp_path, monkeypatch):
+    agents = ["beat_the_landlord:get_computer_move"] * 3
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    expected = simulation.run_simulation(6, agents).to_dict()
+    original_add_completed_range = simulation.add_completed_range
+    calls = [0]
+    def interrupted_add_completed_range(completed, start, stop):
+        calls[0] += 1
+        if calls[0] == 4: # the fourth game is counted in the stats but its seed isn't marked completed yet
+            raise KeyboardInterrupt
+        original_add_completed_range(completed, start, stop)
+    monkeypatch.setattr(simulation, "add_completed_range", interrupted_add_completed_range)
+    with pytest.raises(KeyboardInterrupt):
+        simulation.run_simulation(6, agents, checkpoint_path=checkpoint_path)
+    monkeypatch.setattr(simulation, "add_completed_range", original_add_completed_range)
+    completed, stats, in_progress = simulation.load_checkpoint(checkpoint_path, {"games": 6, "first_seed": 0, "agent_specs": agents})
+    assert completed == [[0, 3]] and stats.games == 3
+    assert simulation.run_simulation(6, agents, checkpoint_path=checkpoint_path).to_dict() == expected
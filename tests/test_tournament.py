@@ -0,0 +1,24 @@
+from beat_the_landlord import get_computer_move
+from tournament import run_sprt_match, score_from_elo, sprt_llr
+
+def passive_move(played_combo, hand):
+    """
+    Plays its lowest card on a new round and passes on everything else
+    """
+    if played_combo is None:
+        return [hand[0]]
+    return "pass"
+
+def test_identical_scores_still_build_up_evidence():
+    assert sprt_llr(100, 50.0, 25.0, 0.5, 0.53) < 0 # every deal drawn
+    assert sprt_llr(100, 100.0, 100.0, 0.5, 0.53) > 0 # every deal won
+
+def test_identical_agents_accept_h0():
+    result = run_sprt_match(get_computer_move, get_computer_move, 300, score_from_elo(0), score_from_elo(20))
+    assert result["decision"] == "H0"
+    assert result["summary"]["deals"] < 300
+
+def test_dominant_agent_stops_early():
+    result = run_sprt_match(get_computer_move, passive_move, 300, score_from_elo(0), score_from_elo(20))
+    assert result["decision"] == "H1"
+    assert result["summary"]["deals"] < 50
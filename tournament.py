@@ -0,0 +1,269 @@
+"""
+Tournament helpers for comparing computer players (move functions like get_computer_move)
+against each other without printed output.
+
+Duplicate mode replays every seeded deal twice with the agents swapping sides: once with agent A
+as the landlord and agent B as both peasants, then once with agent B as the landlord and agent A
+as both peasants. Luck of the deal mostly cancels out within each pair of games, so far fewer
+deals are needed to tell two agents apart than with plain random deals.
+
+Matches can also be run as a sequential probability ratio test (SPRT), which stops as soon as the
+results are strong enough to accept one of two hypotheses about agent A's score, with deals played
+in worker processes and interim results reported as they complete.
+"""
+
+
+import argparse # for the command line interface
+import importlib # for loading agents given as "module:function"
+import math # for square roots and logarithms
+import multiprocessing # for playing deals in worker processes
+import random # for seeded deals
+
+from beat_the_landlord import deal_hands_with_leftovers, generate_shuffled_deck, play_game
+
+def load_agent(spec):
+    """
+    Takes an agent specification of the form "module:function" as an argument and returns the move function
+    """
+    module_name, separator, function_name = spec.partition(":")
+    if separator == "" or module_name == "" or function_name == "":
+        raise ValueError(f"agent must be given as module:function, got {spec!r}")
+    return getattr(importlib.import_module(module_name), function_name)
+
+def deal_seeded_hands(seed):
+    """
+    Takes a seed as an argument and returns the hands of a reproducible deal in turn order
+    (landlord first). The landlord receives the leftovers pile, as in the interactive game.
+    """
+    deck = generate_shuffled_deck(random.Random(seed))
+    hand_1, hand_2, hand_3, leftovers = deal_hands_with_leftovers(deck)
+    for card in leftovers: # give leftovers pile to landlord (hand_3), skipping bidding phase
+        hand_3.append(card)
+    return [hand_3, hand_1, hand_2]
+
+def play_duplicate_deal(seed, agent_a, agent_b):
+    """
+    Takes a seed and two move functions as arguments and plays the seeded deal twice with the agents
+    swapping sides. Returns a dictionary with both game results and agent A's paired score
+    (0.0, 0.5 or 1.0) for the deal.
+    """
+    hands = deal_seeded_hands(seed)
+    a_landlord_result = play_game(hands, (agent_a, agent_b, agent_b)) # agent A as landlord
+    a_peasants_result = play_game(hands, (agent_b, agent_a, agent_a)) # agent A as both peasants
+    a_landlord_win = a_landlord_result["winning_side"] == "landlord"
+    a_peasants_win = a_peasants_result["winning_side"] == "peasants"
+    return {"seed": seed,
+            "a_landlord_win": a_landlord_win,
+            "a_peasants_win": a_peasants_win,
+            "score": (int(a_landlord_win) + int(a_peasants_win)) / 2,
+            "results": (a_landlord_result, a_peasants_result)}
+
+def _variance(values):
+    """
+    Takes a list of numbers as an argument and returns their sample variance (0.0 for fewer than two values)
+    """
+    if len(values) < 2:
+        return 0.0
+    mean = sum(values) / len(values)
+    return sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+
+def summarize_duplicate_results(deal_results):
+    """
+    Takes a list of results from play_duplicate_deal as an argument and returns a summary dictionary with
+    agent A's mean score, its standard error, and the variance reduction achieved by pairing the games
+    compared with playing the same number of games on independent random deals.
+    """
+    deals = len(deal_results)
+    if deals == 0:
+        raise ValueError("no deals to summarize")
+    landlord_scores = [float(result["a_landlord_win"]) for result in deal_results]
+    peasants_scores = [float(result["a_peasants_win"]) for result in deal_results]
+    paired_scores = [result["score"] for result in deal_results]
+    # variance of one deal's score when both games are played on the same deal
+    paired_variance = _variance(paired_scores)
+    # variance of the same estimate if the two games had been played on independent random deals
+    unpaired_variance = (_variance(landlord_scores) + _variance(peasants_scores)) / 4
+    if paired_variance > 0:
+        efficiency = unpaired_variance / paired_variance
+    elif unpaired_variance > 0:
+        efficiency = math.inf # pairing removed all of the variance
+    else:
+        efficiency = 1.0
+    if unpaired_variance > 0:
+        variance_reduction = 1 - paired_variance / unpaired_variance
+    else:
+        variance_reduction = 0.0
+    return {"deals": deals,
+            "games": 2 * deals,
+            "score": sum(paired_scores) / deals,
+            "standard_error": math.sqrt(paired_variance / deals),
+            "a_landlord_win_rate": sum(landlord_scores) / deals,
+            "a_peasants_win_rate": sum(peasants_scores) / deals,
+            "paired_variance": paired_variance,
+            "unpaired_variance": unpaired_variance,
+            "variance_reduction": variance_reduction,
+            # random-deal games needed to match the confidence of one duplicate game
+            "efficiency": efficiency}
+
+def run_duplicate_match(agent_a, agent_b, deals, first_seed=0):
+    """
+    Takes two move functions, a number of deals and an optional first seed as arguments and plays
+    every deal in duplicate. Returns the summary from summarize_duplicate_results.
+    """
+    deal_results = []
+    for seed in range(first_seed, first_seed + deals):
+        deal_results.append(play_duplicate_deal(seed, agent_a, agent_b))
+    return summarize_duplicate_results(deal_results)
+
+def _play_duplicate_deal_task(task):
+    """
+    Takes a (seed, agent_a, agent_b) tuple as an argument and plays it with play_duplicate_deal.
+    Used by worker processes, so the agents must be module-level functions.
+    """
+    seed, agent_a, agent_b = task
+    return play_duplicate_deal(seed, agent_a, agent_b)
+
+def iter_duplicate_deals(agent_a, agent_b, seeds, workers=1):
+    """
+    Takes two move functions, an iterable of seeds and a number of worker processes as arguments
+    and yields the result of each duplicate deal as soon as it completes (not necessarily in seed order).
+    Stopping iteration early terminates the worker processes.
+    """
+    tasks = ((seed, agent_a, agent_b) for seed in seeds)
+    if workers <= 1:
+        for task in tasks:
+            yield _play_duplicate_deal_task(task)
+    else:
+        with multiprocessing.Pool(workers) as pool: # leaving this block terminates the workers
+            for deal_result in pool.imap_unordered(_play_duplicate_deal_task, tasks, chunksize=4):
+                yield deal_result
+
+def score_from_elo(elo):
+    """
+    Takes an Elo difference as an argument and returns the expected score of the stronger side
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+def sprt_bounds(alpha, beta):
+    """
+    Takes the false positive rate alpha and false negative rate beta as arguments and returns the
+    (lower, upper) log-likelihood ratio bounds for accepting H0 and H1 respectively
+    """
+    if not (0 < alpha < 1 and 0 < beta < 1):
+        raise ValueError("alpha and beta must be between 0 and 1")
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+# pseudo-deals added for each paired score (0, 0.5 and 1) before estimating the spread, so a run of identical
+# scores still has some variance and keeps building up evidence instead of leaving the test undecided forever
+SPRT_PRIOR_DEALS = 0.5
+
+def sprt_llr(deals, score_sum, score_square_sum, score0, score1):
+    """
+    Takes the number of deals, the sum of agent A's paired scores, the sum of their squares and the
+    expected scores under H0 and H1 as arguments and returns the log-likelihood ratio of H1 against H0.
+    Uses the normal approximation of the generalized SPRT, since paired scores are 0, 0.5 or 1, with the
+    mean and variance estimated after adding SPRT_PRIOR_DEALS pseudo-deals of each score.
+    """
+    if deals < 2:
+        return 0.0
+    prior_deals = 3 * SPRT_PRIOR_DEALS
+    mean = (score_sum + SPRT_PRIOR_DEALS * (0 + 0.5 + 1)) / (deals + prior_deals)
+    square_mean = (score_square_sum + SPRT_PRIOR_DEALS * (0 + 0.25 + 1)) / (deals + prior_deals)
+    variance = square_mean - mean ** 2 # always positive thanks to the pseudo-deals
+    return deals * (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance)
+
+def run_sprt_match(agent_a, agent_b, max_deals, score0, score1, alpha=0.05, beta=0.05,
+                   first_seed=0, workers=1, progress=None, report_every=100):
+    """
+    Takes two move functions, a maximum number of deals, agent A's expected paired score under H0 and H1,
+    the error rates alpha and beta, a first seed, a number of worker processes and an optional progress
+    callback as arguments. Plays duplicate deals until the SPRT accepts a hypothesis or max_deals is reached.
+    The progress callback is called with an interim status dictionary every report_every completed deals.
+    Returns a dictionary with the decision ("H0", "H1" or "inconclusive"), the final log-likelihood ratio,
+    the duplicate summary and the number of games saved compared with playing every deal.
+    """
+    if not score0 < score1:
+        raise ValueError("score0 must be lower than score1")
+    lower, upper = sprt_bounds(alpha, beta)
+    deal_results = []
+    score_sum = 0.0
+    score_square_sum = 0.0
+    llr = 0.0
+    decision = "inconclusive"
+    seeds = range(first_seed, first_seed + max_deals)
+    for deal_result in iter_duplicate_deals(agent_a, agent_b, seeds, workers):
+        deal_results.append(deal_result)
+        score_sum += deal_result["score"]
+        score_square_sum += deal_result["score"] ** 2
+        llr = sprt_llr(len(deal_results), score_sum, score_square_sum, score0, score1)
+        if llr >= upper:
+            decision = "H1"
+        elif llr <= lower:
+            decision = "H0"
+        if progress is not None and (decision != "inconclusive" or len(deal_results) % report_every == 0):
+            progress({"deals": len(deal_results),
+                      "score": score_sum / len(deal_results),
+                      "llr": llr,
+                      "lower": lower,
+                      "upper": upper,
+                      "decision": decision})
+        if decision != "inconclusive": # stop the match as soon as a decision is reached
+            break
+    return {"decision": decision,
+            "llr": llr,
+            "lower": lower,
+            "upper": upper,
+            "summary": summarize_duplicate_results(deal_results),
+            "games_saved": 2 * (max_deals - len(deal_results))}
+
+def format_summary(summary):
+    """
+    Takes a summary dictionary as an argument and returns it as printable text
+    """
+    lines = [f"Deals: {summary['deals']} ({summary['games']} games)",
+             f"Agent A score: {summary['score']:.4f} +/- {summary['standard_error']:.4f}",
+             f"Agent A win rate as landlord: {summary['a_landlord_win_rate']:.4f}",
+             f"Agent A win rate as peasants: {summary['a_peasants_win_rate']:.4f}",
+             f"Variance reduction vs random deals: {summary['variance_reduction']:.1%} "
+             f"(one duplicate game is worth {summary['efficiency']:.2f} random-deal games)"]
+    return "\n".join(lines)
+
+def main(argv=None):
+    """
+    Command line interface for running a duplicate match between two agents
+    """
+    parser = argparse.ArgumentParser(description="Compare two Beat the Landlord agents on duplicate deals.")
+    parser.add_argument("--agent-a", default="beat_the_landlord:get_computer_move", help="agent A as module:function")
+    parser.add_argument("--agent-b", default="beat_the_landlord:get_computer_move", help="agent B as module:function")
+    parser.add_argument("--deals", type=int, default=1000, help="number of seeded deals to play")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first deal")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes (SPRT only)")
+    parser.add_argument("--sprt", action="store_true", help="stop early with a sequential probability ratio test, using --deals as the maximum")
+    parser.add_argument("--elo0", type=float, default=0.0, help="Elo difference of agent A under H0")
+    parser.add_argument("--elo1", type=float, default=20.0, help="Elo difference of agent A under H1")
+    parser.add_argument("--score0", type=float, help="expected score of agent A under H0 (overrides --elo0)")
+    parser.add_argument("--score1", type=float, help="expected score of agent A under H1 (overrides --elo1)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="false positive rate")
+    parser.add_argument("--beta", type=float, default=0.05, help="false negative rate")
+    args = parser.parse_args(argv)
+    agent_a = load_agent(args.agent_a)
+    agent_b = load_agent(args.agent_b)
+    if not args.sprt:
+        summary = run_duplicate_match(agent_a, agent_b, args.deals, args.first_seed)
+        print(format_summary(summary))
+        return
+    score0 = args.score0 if args.score0 is not None else score_from_elo(args.elo0)
+    score1 = args.score1 if args.score1 is not None else score_from_elo(args.elo1)
+
+    def print_progress(status):
+        print(f"Deals: {status['deals']}  score: {status['score']:.4f}  "
+              f"LLR: {status['llr']:.3f} [{status['lower']:.3f}, {status['upper']:.3f}]", flush=True)
+
+    result = run_sprt_match(agent_a, agent_b, args.deals, score0, score1, args.alpha, args.beta,
+                            args.first_seed, args.workers, print_progress)
+    print(format_summary(result["summary"]))
+    print(f"SPRT decision: {result['decision']} (LLR {result['llr']:.3f}), games saved: {result['games_saved']}")
+
+
+if __name__ == "__main__":
+    main()